@@ -1,5 +1,7 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
 
 User = get_user_model()
 
@@ -9,29 +11,32 @@ class PhoneBackend(ModelBackend):
     Custom authentication backend to allow login with phone number or email
     """
     def authenticate(self, request, phone=None, email=None, password=None, **kwargs):
-        if password is None:
+        if password is None or not (phone or email):
+            # Not a phone/email login (e.g. the admin form); leave it to ModelBackend
             return None
         
-        user = None
-        
-        # Try to authenticate with phone
+        # Phone and email are both unique: one query covers either identifier
+        lookup = Q()
         if phone:
-            try:
-                user = User.objects.get(phone=phone)
-            except User.DoesNotExist:
-                pass
+            lookup |= Q(phone=phone)
+        if email:
+            lookup |= Q(email=email)
+        candidates = list(User.objects.filter(lookup)[:2])
         
-        # Try to authenticate with email
-        if not user and email:
-            try:
-                user = User.objects.get(email=email)
-            except User.DoesNotExist:
-                pass
+        # A phone match wins over an email match, as before
+        user = next((u for u in candidates if phone and u.phone == phone), None)
+        if user is None and candidates:
+            user = candidates[0]
         
-        if user and user.check_password(password):
+        if user is None:
+            # Hash anyway so an unknown account takes as long as a wrong password
+            User().set_password(password)
+        elif user.check_password(password):
             return user
         
-        return None
+        # This backend owns phone/email credentials; stop authenticate() from
+        # handing them to ModelBackend, which would look up and hash them again
+        raise PermissionDenied
     
     def get_user(self, user_id):
         try:
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-16 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_is_provider_register'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registrationpayment',
+            index=models.Index(fields=['user', 'status'], name='regpay_user_status_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-16 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_registrationpayment_user_status_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registrationpayment',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['gateway_ref'], name='regpay_pending_gwref_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-16 13:20
+
+from django.db import migrations, models
+
+
+def fail_duplicate_pending_payments(apps, schema_editor):
+    RegistrationPayment = apps.get_model('accounts', 'RegistrationPayment')
+    seen = set()
+    duplicates = []
+    for payment in RegistrationPayment.objects.filter(
+        status='PENDING'
+    ).order_by('user_id', '-created_at').only('id', 'user_id'):
+        if payment.user_id in seen:
+            duplicates.append(payment.id)
+        else:
+            seen.add(payment.user_id)
+    RegistrationPayment.objects.filter(id__in=duplicates).update(status='FAILED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_registrationpayment_pending_gwref_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_pending_payments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='registrationpayment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'PENDING')), fields=('user',), name='one_pending_registration_payment_per_user'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-16 13:50
+
+from django.db import migrations, models
+from django.db.models.functions import Cast
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_registrationpayment_one_pending_per_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrationpayment',
+            name='amount_paise',
+            field=models.GeneratedField(db_persist=True, expression=Cast(models.F('amount') * 100, models.IntegerField()), output_field=models.IntegerField()),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
+from django.db.models.functions import Cast
 from django.utils import timezone
 
 
@@ -136,6 +137,12 @@ class RegistrationPayment(models.Model):
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='registration_payments')
     amount = models.DecimalField(max_digits=10, decimal_places=2, default=100.00)
+    # Razorpay works in paise; computed by the database so it always matches amount
+    amount_paise = models.GeneratedField(
+        expression=Cast(models.F('amount') * 100, models.IntegerField()),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     gateway_ref = models.CharField(max_length=255, blank=True)
     gateway_order_id = models.CharField(max_length=255, blank=True)
@@ -145,6 +152,25 @@ class RegistrationPayment(models.Model):
     class Meta:
         db_table = 'registration_payments'
         ordering = ['-created_at']
+        constraints = [
+            # One open payment per user; create_payment_link relies on this to
+            # handle concurrent requests without duplicate Razorpay orders
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(status='PENDING'),
+                name='one_pending_registration_payment_per_user'
+            ),
+        ]
+        indexes = [
+            # create_payment_link reads every payment of a user by status
+            models.Index(fields=['user', 'status'], name='regpay_user_status_idx'),
+            # payment_callback looks up the pending payment by Razorpay order id
+            models.Index(
+                fields=['gateway_ref'],
+                condition=models.Q(status='PENDING'),
+                name='regpay_pending_gwref_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"Payment {self.id} - {self.user.name} - {self.status}"
\ No newline at end of file
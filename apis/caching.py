@@ -0,0 +1,109 @@
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import get_template
+from django.utils.html import escape
+from .renderers import ORJSONRenderer
+
+REFERENCE_DATA_TIMEOUT = 60 * 60  # 1 hour
+REFERENCE_VERSION_KEY = 'reference_data:version'
+AI_GUIDE_TIMEOUT = 60 * 60 * 24  # 1 day
+AI_GUIDE_TRAILING_PUNCTUATION = '?!.। '  # includes the Devanagari danda
+USER_PAYLOAD_TIMEOUT = 60 * 10  # 10 minutes
+PAYMENT_STATUS_TIMEOUT = 60  # 1 minute
+
+
+def reference_data_key(name):
+    """Cache key for dropdown/reference data, stamped with the current data version"""
+    version = cache.get_or_set(REFERENCE_VERSION_KEY, time.time_ns, None)
+    return f'{name}:v{version}'
+
+
+def invalidate_reference_data():
+    """Start a new version so every previously cached reference entry is skipped"""
+    cache.set(REFERENCE_VERSION_KEY, time.time_ns(), None)
+
+
+def cached_json_response(key, build_payload, timeout=REFERENCE_DATA_TIMEOUT):
+    """
+    Return a JSON response whose rendered body is cached as bytes.
+    On a hit the serializer and renderer are skipped entirely.
+    """
+    body = cache.get(key)
+    if body is None:
+        body = ORJSONRenderer().render(build_payload())
+        cache.set(key, body, timeout)
+    return HttpResponse(body, content_type='application/json')
+
+
+def ai_guide_key(question, language):
+    """Cache key for an AI guide answer; case, whitespace runs and closing punctuation don't matter"""
+    question = " ".join(question.lower().split()).rstrip(AI_GUIDE_TRAILING_PUNCTUATION)
+    normalized = f'{language}|{question}'
+    return 'ai_guide:' + hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def user_payload_key(user_id):
+    """Cache key for the /auth/me user payload; cleared by apis.signals on change"""
+    return f'user_payload:{user_id}'
+
+
+def invalidate_user_payload(user_id):
+    cache.delete(user_payload_key(user_id))
+
+
+def payment_status_key(payment_id):
+    """Cache key for a registration payment status row; cleared when the payment changes"""
+    return f'registration_payment_status:{payment_id}'
+
+
+def invalidate_payment_status(payment_id):
+    cache.delete(payment_status_key(payment_id))
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_template(template_name):
+    return get_template(template_name)
+
+
+def render_page(request, template_name, context):
+    """
+    Same as django.shortcuts.render, but each template is resolved and compiled
+    once per process instead of going through the loaders on every request.
+    The payment templates only read their explicit context, so they render with
+    a plain Context: no RequestContext and no context processors per response.
+    """
+    return HttpResponse(_compiled_template(template_name).render(context))
+
+
+# Stands in for error_message while a message page is pre-rendered
+_MESSAGE_SLOT = '\x00error_message\x00'
+
+
+@functools.lru_cache(maxsize=None)
+def _message_page_parts(template_name):
+    html = _compiled_template(template_name).render({
+        'error_message': _MESSAGE_SLOT,
+        'frontend_url': settings.FRONTEND_URL,
+    })
+    return html.split(_MESSAGE_SLOT)
+
+
+# The fixed messages ("Payment record not found", ...) are a handful per template;
+# the bound only matters for the f'Error: {e}' fallbacks
+@functools.lru_cache(maxsize=128)
+def _message_page_body(template_name, error_message):
+    return escape(error_message).join(_message_page_parts(template_name)).encode()
+
+
+def render_message_page(template_name, error_message):
+    """
+    Payment error/failure pages only vary by error_message: render each one once
+    per process and splice the (escaped) message in; repeated messages reuse
+    the finished, encoded body.
+    """
+    return HttpResponse(_message_page_body(template_name, error_message))
@@ -3,6 +3,8 @@ from providers.models import (
     ServicePricing, ServiceProvider, ServiceCategory, ServiceType, 
     ServiceArea, ProviderSubscription
 )
+from django.db import models
+from .serializers import CachedFieldsMixin, FastListSerializer
 from django.utils import timezone
 
 
@@ -178,7 +180,38 @@ class ServiceProviderSubmitSerializer(serializers.Serializer):
             raise serializers.ValidationError("All declarations must be accepted")
         return data
 
-class ServiceProviderDetailSerializer(serializers.ModelSerializer):
+class AbsoluteFileField(serializers.FileField):
+    """
+    Read-only FileField output that resolves the request's scheme and host once
+    per response instead of calling build_absolute_uri() for every file.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        try:
+            url = value.url
+        except AttributeError:
+            return None
+
+        request = self.context.get('request')
+        if request is None or not url.startswith('/') or url.startswith('//'):
+            return url
+
+        # The context dict is shared by every row of a many=True serializer
+        origin = self.context.get('_request_origin')
+        if origin is None:
+            origin = self.context['_request_origin'] = request.build_absolute_uri('/')[:-1]
+        return origin + url
+
+
+class ServiceProviderDetailSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    # Six document/photo fields per provider; see AbsoluteFileField
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.FileField: AbsoluteFileField,
+        models.ImageField: AbsoluteFileField,
+    }
 
     user_name = serializers.CharField(source='user.name', read_only=True)
     user_phone = serializers.CharField(source='user.phone', read_only=True)
@@ -247,14 +280,39 @@ class ServiceProviderDetailSerializer(serializers.ModelSerializer):
             'rejection_reason', 'submitted_at',
             'created_at', 'updated_at'
         ]
+        list_serializer_class = FastListSerializer
+
+    # List views prefetch these relations (see list_pending_providers); read the
+    # prefetch cache when present instead of issuing a .values() query per row
+    def _is_prefetched(self, obj, relation):
+        return relation in getattr(obj, '_prefetched_objects_cache', {})
 
     def get_categories(self, obj):
+        if self._is_prefetched(obj, 'service_categories'):
+            return [
+                {'id': cat.id, 'name': cat.name, 'icon': cat.icon}
+                for cat in obj.service_categories.all()
+            ]
         return obj.service_categories.values('id', 'name', 'icon')
 
     def get_service_types_list(self, obj):
+        if self._is_prefetched(obj, 'service_types'):
+            return [
+                {'id': st.id, 'name': st.name, 'category__name': st.category.name}
+                for st in obj.service_types.all()
+            ]
         return obj.service_types.values('id', 'name', 'category__name')
 
     def get_service_costs(self, obj):
+        if self._is_prefetched(obj, 'service_pricings'):
+            return [
+                {
+                    'service_type_id': pricing.service_type_id,
+                    'service_type__name': pricing.service_type.name,
+                    'price': pricing.price,
+                }
+                for pricing in obj.service_pricings.all()
+            ]
         return obj.service_pricings.values(
             'service_type_id',
             'service_type__name',
@@ -262,8 +320,15 @@ class ServiceProviderDetailSerializer(serializers.ModelSerializer):
         )
 
     def get_registration_payment_status(self, obj):
-        payment = obj.user.registration_payments.order_by('-created_at').first()
-        return payment.status if payment else None
+        # Annotated by provider_detail_queryset(); otherwise look it up
+        if hasattr(obj, 'latest_payment_status'):
+            return obj.latest_payment_status
+        return (
+            obj.user.registration_payments
+            .order_by('-created_at')
+            .values_list('status', flat=True)
+            .first()
+        )
 
 
 class ProviderSubscriptionSerializer(serializers.ModelSerializer):
@@ -288,27 +353,16 @@ class ProviderSubscriptionCreateSerializer(serializers.Serializer):
         user = self.context['request'].user
         
         # Check if provider profile exists and is verified
-        try:
-            provider = user.provider_profile
-            if provider.verification_status != 'VERIFIED':
-                raise serializers.ValidationError(
-                    "Your provider profile must be verified before subscribing"
-                )
-        except ServiceProvider.DoesNotExist:
+        provider = getattr(user, 'provider_profile', None)
+        if provider is None:
             raise serializers.ValidationError("Provider profile not found")
+        if provider.verification_status != 'VERIFIED':
+            raise serializers.ValidationError(
+                "Your provider profile must be verified before subscribing"
+            )
         
-        # Check for existing pending subscription
-        pending_sub = ProviderSubscription.objects.filter(
-            provider=provider,
-            status='PENDING'
-        ).first()
-        
-        if pending_sub:
-            raise serializers.ValidationError({
-                'message': 'Pending subscription already exists',
-                'subscription_id': pending_sub.id
-            })
-        
+        # Duplicate pending subscriptions are rejected by the
+        # one_open_subscription_per_provider constraint when the view inserts.
         return data
 
 class ServiceProviderListSerializer(serializers.ModelSerializer):
@@ -362,30 +416,34 @@ class ServiceProviderListSerializer(serializers.ModelSerializer):
             'verification_date',
         ]
     
+    def _related(self, obj, relation):
+        """M2M rows from the view's prefetch, ordered by id (same row .first() picked)"""
+        return sorted(getattr(obj, relation).all(), key=lambda row: row.pk)
+
     # New: Return all categories
     def get_categories(self, obj):
-        return obj.service_categories.values('id', 'name')
+        return [{'id': cat.id, 'name': cat.name} for cat in self._related(obj, 'service_categories')]
 
     # New: Return all types
     def get_service_types_list(self, obj):
-        return obj.service_types.values('id', 'name')
+        return [{'id': st.id, 'name': st.name} for st in self._related(obj, 'service_types')]
 
     # Old: Return just the first one to satisfy legacy frontend
     def get_category_id(self, obj):
-        cat = obj.service_categories.first()
-        return cat.id if cat else None
+        cats = self._related(obj, 'service_categories')
+        return cats[0].id if cats else None
 
     def get_category_name(self, obj):
-        cat = obj.service_categories.first()
-        return cat.name if cat else None
+        cats = self._related(obj, 'service_categories')
+        return cats[0].name if cats else None
 
     def get_service_type_id(self, obj):
-        st = obj.service_types.first()
-        return st.id if st else None
+        types = self._related(obj, 'service_types')
+        return types[0].id if types else None
 
     def get_service_type_name(self, obj):
-        st = obj.service_types.first()
-        return st.name if st else None
+        types = self._related(obj, 'service_types')
+        return types[0].name if types else None
     
     def get_profile_photo_url(self, obj):
         if obj.profile_photo:
@@ -1,4 +1,4 @@
-from accounts.models import User
+from accounts.models import RegistrationPayment
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -7,43 +7,106 @@ from rest_framework import status
 from django.conf import settings
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from django.shortcuts import render
-import razorpay
-import hmac
-import hashlib
-from datetime import timedelta
+from decimal import Decimal
 from dateutil.relativedelta import relativedelta
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Q, Subquery
 from providers.models import (
     ServiceProvider, ServiceCategory, ServiceType,
     ServiceArea, ProviderSubscription
 )
-from django.shortcuts import get_object_or_404
 from .provider_serializers import (
     ServiceProviderCreateSerializer, ServiceProviderUpdateSerializer,
     ServiceProviderDetailSerializer, ServiceProviderSubmitSerializer,
     ServiceCategorySerializer, ServiceTypeSerializer, ServiceAreaSerializer,
     ProviderSubscriptionSerializer, ProviderSubscriptionCreateSerializer, ServiceProviderListSerializer
 )
+from .caching import cached_json_response, reference_data_key, render_message_page, render_page
+from .services.razorpay_service import to_paise, verify_payment_signature
+from .tasks import create_subscription_order
+
+
+def _build_plan(amount, listing_slots):
+    amount = Decimal(amount)
+    gst = (amount * GST_RATE).quantize(Decimal('0.01'))
+    total = amount + gst
+    return {
+        'amount': amount,
+        'listing_slots': listing_slots,
+        'gst': gst,
+        'total': total,
+        'paise': to_paise(total),
+    }
+
+
+# Settings read on every subscription payment request, bound once at import
+RAZORPAY_KEY_ID = settings.RAZORPAY_KEY_ID
+FRONTEND_URL = settings.FRONTEND_URL
+SUBSCRIPTION_CHECKOUT_URL = f"{settings.BASE_URL}/api/providers/subscription/checkout/{{}}"
+SUBSCRIPTION_CALLBACK_URL = f"{settings.BASE_URL}/api/providers/subscription/callback"
+
+# The checkout page reloads every 2s while its Razorpay order is created; stop after
+# the order task's full retry schedule (5s + 10s + 20s plus the gateway calls)
+CHECKOUT_MAX_REFRESHES = 45
+ORDER_FAILED_MESSAGE = 'Could not create the payment order. Please go back and start the payment again.'
+
+
+def checkout_refresh_attempt(request):
+    """How many times a checkout page waiting for its order has reloaded (?attempt=N)"""
+    attempt = request.GET.get('attempt', '')
+    return int(attempt) if attempt.isdigit() else 0
+
+
+# Columns ProviderSubscriptionSerializer reads (plan_name is derived from plan_type)
+SUBSCRIPTION_SERIALIZER_COLUMNS = (
+    'id', 'plan_type', 'amount', 'listing_slots',
+    'status', 'start_date', 'end_date', 'created_at',
+)
+
+# Subscription pricing (GST 18%), computed once with Decimal to avoid float rounding
+GST_RATE = Decimal('0.18')
+SUBSCRIPTION_PLANS = {
+    'MONTHLY': _build_plan('199.00', 1),
+    'YEARLY': _build_plan('1499.00', 3),
+}
+
 
-# Initialize Razorpay client
-razorpay_client = razorpay.Client(
-    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+# Columns ServiceProviderDetailSerializer never reads (search-only arrays, joined password hashes)
+PROVIDER_DETAIL_DEFERRED_FIELDS = (
+    'category_ids', 'type_ids', 'area_ids',
+    'user__password', 'verified_by__password',
 )
 
 
+def provider_detail_queryset():
+    """ServiceProvider queryset with the relations ServiceProviderDetailSerializer reads"""
+    # Latest registration payment status comes back in the same SELECT
+    latest_payment = RegistrationPayment.objects.filter(
+        user=OuterRef('user_id')
+    ).order_by('-created_at').values('status')[:1]
+
+    return ServiceProvider.objects.select_related(
+        'user', 'city', 'verified_by'
+    ).prefetch_related('service_areas').defer(
+        *PROVIDER_DETAIL_DEFERRED_FIELDS
+    ).annotate(latest_payment_status=Subquery(latest_payment))
+
+
 # ===== Helper APIs for Dropdowns =====
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_service_categories(request):
     """Get all active service categories"""
-    categories = ServiceCategory.objects.filter(is_active=True)
-    serializer = ServiceCategorySerializer(categories, many=True)
-    return Response({
-        'success': True,
-        'data': serializer.data
-    })
+    def build_payload():
+        categories = ServiceCategory.objects.filter(is_active=True)
+        serializer = ServiceCategorySerializer(categories, many=True)
+        return {
+            'success': True,
+            'data': serializer.data
+        }
+
+    return cached_json_response(reference_data_key('svc_cats'), build_payload)
 
 
 @api_view(['GET'])
@@ -51,18 +114,25 @@ def get_service_categories(request):
 def get_service_types(request):
     category_ids = request.query_params.get('category_id')
 
-    queryset = ServiceType.objects.filter(is_active=True)
-
+    ids = None
     if category_ids:
-        ids = [int(cid) for cid in category_ids.split(',') if cid.isdigit()]
-        queryset = queryset.filter(category_id__in=ids)
+        ids = sorted({int(cid) for cid in category_ids.split(',') if cid.isdigit()})
 
-    serializer = ServiceTypeSerializer(queryset, many=True)
+    def build_payload():
+        queryset = ServiceType.objects.filter(is_active=True)
 
-    return Response({
-        'success': True,
-        'data': serializer.data
-    })
+        if ids is not None:
+            queryset = queryset.filter(category_id__in=ids)
+
+        serializer = ServiceTypeSerializer(queryset, many=True)
+
+        return {
+            'success': True,
+            'data': serializer.data
+        }
+
+    key_suffix = 'all' if ids is None else ','.join(map(str, ids))
+    return cached_json_response(reference_data_key(f'svc_types:{key_suffix}'), build_payload)
 
 
 @api_view(['GET'])
@@ -77,15 +147,67 @@ def get_service_areas(request):
             'message': 'location_id is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    service_areas = ServiceArea.objects.filter(
-        location_id=location_id,
-        is_active=True
-    )
-    serializer = ServiceAreaSerializer(service_areas, many=True)
-    return Response({
-        'success': True,
-        'data': serializer.data
-    })
+    if not location_id.isdigit():
+        return Response({
+            'success': False,
+            'message': 'Invalid location_id'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    def build_payload():
+        service_areas = ServiceArea.objects.filter(
+            location_id=location_id,
+            is_active=True
+        )
+        serializer = ServiceAreaSerializer(service_areas, many=True)
+        return {
+            'success': True,
+            'data': serializer.data
+        }
+
+    return cached_json_response(reference_data_key(f'svc_areas:{int(location_id)}'), build_payload)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_provider_bootstrap(request):
+    """Categories, service types and (optionally) service areas in one response"""
+    location_id = request.query_params.get('location_id')
+
+    if location_id and not location_id.isdigit():
+        return Response({
+            'success': False,
+            'message': 'Invalid location_id'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    def build_payload():
+        categories = ServiceCategory.objects.filter(is_active=True)
+        service_types = ServiceTypeSerializer(
+            ServiceType.objects.filter(is_active=True),
+            many=True
+        ).data
+        service_areas = ServiceArea.objects.none()
+        if location_id:
+            service_areas = ServiceArea.objects.filter(
+                location_id=location_id,
+                is_active=True
+            )
+
+        # Grouped here so clients can skip the per-category service types calls
+        types_by_category = {}
+        for service_type in service_types:
+            types_by_category.setdefault(service_type['category'], []).append(service_type)
+
+        return {
+            'success': True,
+            'data': {
+                'categories': ServiceCategorySerializer(categories, many=True).data,
+                'service_types': service_types,
+                'types_by_category': types_by_category,
+                'service_areas': ServiceAreaSerializer(service_areas, many=True).data,
+            }
+        }
+
+    key_suffix = int(location_id) if location_id else 'none'
+    return cached_json_response(reference_data_key(f'provider_bootstrap:{key_suffix}'), build_payload)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -118,10 +240,10 @@ def get_services(request):
                 'message': 'Invalid service_types format'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # --- FIX: Use Many-to-Many lookup (plural field names) ---
+        # Overlap on the denormalized id arrays: no M2M joins, so no DISTINCT needed
         providers = ServiceProvider.objects.filter(
-            service_categories__id__in=category_list, # Was: service_category_id
-            service_types__id__in=service_type_list,  # Was: service_type_id
+            category_ids__overlap=category_list,
+            type_ids__overlap=service_type_list,
             verification_status='VERIFIED'            # NOTE: Only verified providers show up!
         ).select_related(
             'user', 
@@ -130,7 +252,7 @@ def get_services(request):
             'service_areas',
             'service_categories', # Prefetch M2M
             'service_types'       # Prefetch M2M
-        ).distinct() # DISTINCT is vital for M2M filtering to avoid duplicates
+        )
         
         serializer = ServiceProviderListSerializer(providers, many=True, context={'request': request})
         
@@ -206,28 +328,29 @@ def get_services_and_providers(request):
     #     }, status=status.HTTP_400_BAD_REQUEST)
 
     # 3. Build Filters for Providers
+    # Uses the denormalized id arrays (GIN-indexed `&&` overlap), so no M2M joins / DISTINCT
     filters = Q(verification_status='VERIFIED')
 
-    # FIX: Updated Lookups for Many-to-Many (Use plural field names)
     if category_list:
         # Check if provider has any of these categories
-        filters &= Q(service_categories__id__in=category_list)
-        
-        # Optional: Ensure the provider's service types also belong to these categories
-        # Note: 'service_types' is the M2M field name on Provider
-        filters &= Q(service_types__category__id__in=category_list)
-
-    if service_type_list:
-        # Check if provider offers any of these specific service types
-        filters &= Q(service_types__id__in=service_type_list)
+        filters &= Q(category_ids__overlap=category_list)
+
+    if category_list or service_type_list:
+        # Provider must offer a matching service type (restricted to the
+        # requested categories when those are given)
+        type_ids = service_type_list
+        if category_list:
+            type_qs = ServiceType.objects.filter(category_id__in=category_list)
+            if service_type_list:
+                type_qs = type_qs.filter(id__in=service_type_list)
+            type_ids = list(type_qs.values_list('id', flat=True))
+        filters &= Q(type_ids__overlap=type_ids)
 
     if service_area_list:
-        filters &= Q(service_areas__id__in=service_area_list)
+        filters &= Q(area_ids__overlap=service_area_list)
 
     # 4. Fetch Providers (Optimized)
-    # FIX: Removed 'service_category'/'service_type' from select_related (they are lists now)
-    # FIX: Added them to prefetch_related
-    providers = ServiceProvider.objects.filter(filters).distinct().select_related(
+    providers = ServiceProvider.objects.filter(filters).select_related(
         'user', 'city'
     ).prefetch_related(
         'service_areas',
@@ -314,7 +437,7 @@ def get_provider_profile(request):
 
     if request.method == 'GET':
         try:
-            provider = request.user.provider_profile
+            provider = provider_detail_queryset().get(user_id=request.user.id)
         except ServiceProvider.DoesNotExist:
             return Response({
                 'success': False,
@@ -331,7 +454,7 @@ def get_provider_profile(request):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            provider = ServiceProvider.objects.get(id=provider_id)
+            provider = provider_detail_queryset().get(id=provider_id)
         except ServiceProvider.DoesNotExist:
             return Response({
                 'success': False,
@@ -353,32 +476,6 @@ def submit_provider_application(request):
 
     user = request.user
 
-    try:
-        provider = user.provider_profile
-    except ServiceProvider.DoesNotExist:
-        return Response({
-            'success': False,
-            'message': 'Provider profile not found. Please create your profile first.'
-        }, status=status.HTTP_404_NOT_FOUND)
-
-    provider.refresh_from_db()
-
-    # 🚫 Prevent duplicate submissions
-    if provider.verification_status not in ['DRAFT', 'REJECTED']:
-        return Response({
-            'success': False,
-            'message': f'Application already {provider.verification_status.lower()}'
-        }, status=status.HTTP_400_BAD_REQUEST)
-
-    # ✅ Validate declarations
-    serializer = ServiceProviderSubmitSerializer(data=request.data)
-    if not serializer.is_valid():
-        return Response({
-            'success': False,
-            'message': 'All declarations must be accepted',
-            'errors': serializer.errors
-        }, status=status.HTTP_400_BAD_REQUEST)
-
     # 📋 Required field validation (UPDATED for M2M fields)
     required_fields = [
         'whatsapp_number',
@@ -397,18 +494,48 @@ def submit_provider_application(request):
         'profile_photo',
     ]
 
-    missing_fields = []
+    # M2M fields are checked through their denormalised id arrays
+    relation_columns = {
+        'service_categories': 'category_ids',
+        'service_types': 'type_ids',
+        'service_areas': 'area_ids',
+    }
+
+    # Validation only needs these columns; the full instance is loaded after it passes
+    provider_data = ServiceProvider.objects.filter(user=user).values(
+        'id',
+        'verification_status',
+        'area_ids',
+        *[relation_columns.get(field, field) for field in required_fields]
+    ).first()
+
+    if provider_data is None:
+        return Response({
+            'success': False,
+            'message': 'Provider profile not found. Please create your profile first.'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    # 🚫 Prevent duplicate submissions
+    if provider_data['verification_status'] not in ['DRAFT', 'REJECTED']:
+        return Response({
+            'success': False,
+            'message': f'Application already {provider_data["verification_status"].lower()}'
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-    for field in required_fields:
-        # Handle ManyToMany fields correctly
-        if field in ['service_categories', 'service_types', 'service_areas']:
-            if not getattr(provider, field).exists():
-                missing_fields.append(field.replace('_', ' ').title())
-            continue
+    # ✅ Validate declarations
+    serializer = ServiceProviderSubmitSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'message': 'All declarations must be accepted',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-        value = getattr(provider, field, None)
-        if not value:
-            missing_fields.append(field.replace('_', ' ').title())
+    missing_fields = [
+        field.replace('_', ' ').title()
+        for field in required_fields
+        if not provider_data[relation_columns.get(field, field)]
+    ]
 
     if missing_fields:
         return Response({
@@ -417,17 +544,22 @@ def submit_provider_application(request):
             'missing_fields': missing_fields
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    if not provider.service_areas.exists():
+    if not provider_data['area_ids']:
         return Response({
             'success': False,
             'message': 'Please select at least one service area'
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # 🚀 Submit for verification
-    provider.verification_status = 'PENDING_VERIFICATION'
-    provider.submitted_at = timezone.now()
-    provider.rejection_reason = ''
-    provider.save()
+    # 🚀 Submit for verification (only the changed columns are written)
+    now = timezone.now()
+    ServiceProvider.objects.filter(pk=provider_data['id']).update(
+        verification_status='PENDING_VERIFICATION',
+        submitted_at=now,
+        rejection_reason='',
+        updated_at=now
+    )
+
+    provider = provider_detail_queryset().get(pk=provider_data['id'])
 
     detail_serializer = ServiceProviderDetailSerializer(
         provider,
@@ -449,19 +581,20 @@ def create_subscription_payment(request):
     """Create payment link for provider subscription"""
     user = request.user
     
-    # Validate provider profile
-    try:
-        provider = user.provider_profile
-        if provider.verification_status != 'VERIFIED':
-            return Response({
-                'success': False,
-                'message': 'Your provider profile must be verified first'
-            }, status=status.HTTP_400_BAD_REQUEST)
-    except ServiceProvider.DoesNotExist:
+    # Validate provider profile (looked up once; the serializer reuses the cached relation)
+    provider = getattr(user, 'provider_profile', None)
+
+    if provider is None:
         return Response({
             'success': False,
             'message': 'Provider profile not found'
         }, status=status.HTTP_404_NOT_FOUND)
+
+    if provider.verification_status != 'VERIFIED':
+        return Response({
+            'success': False,
+            'message': 'Your provider profile must be verified first'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     # Validate plan type
     serializer = ProviderSubscriptionCreateSerializer(
@@ -487,49 +620,61 @@ def create_subscription_payment(request):
     
     plan_type = serializer.validated_data['plan_type']
     
-    # Calculate amount and slots
-    if plan_type == 'MONTHLY':
-        amount = 199.00
-        listing_slots = 1
-    else:  # YEARLY
-        amount = 1499.00
-        listing_slots = 3
-    
-    # Add GST (18%)
-    gst_amount = amount * 0.18
-    total_amount = amount + gst_amount
+    # Amount, slots and GST are precomputed per plan
+    plan = SUBSCRIPTION_PLANS[plan_type]
+    amount = plan['amount']
+    listing_slots = plan['listing_slots']
+    gst_amount = plan['gst']
+    total_amount = plan['total']
     
+    # Create subscription record; the Razorpay order is created in the background.
+    # The one_open_subscription_per_provider constraint rejects duplicates atomically.
     try:
-        # Create Razorpay Order
-        razorpay_order = razorpay_client.order.create({
-            'amount': int(total_amount * 100),  # Convert to paise
-            'currency': 'INR',
-            'payment_capture': 1,
-            'notes': {
-                'provider_id': str(provider.id),
-                'plan_type': plan_type,
-                'payment_type': 'provider_subscription'
-            }
-        })
-        
-        # Create subscription record
-        subscription = ProviderSubscription.objects.create(
+        with transaction.atomic():
+            subscription = ProviderSubscription.objects.create(
+                provider=provider,
+                plan_type=plan_type,
+                amount=total_amount,
+                listing_slots=listing_slots,
+                status='PENDING_ORDER'
+            )
+    except IntegrityError:
+        pending_sub = ProviderSubscription.objects.filter(
             provider=provider,
-            plan_type=plan_type,
-            amount=total_amount,
-            listing_slots=listing_slots,
-            status='PENDING',
-            gateway_order_id=razorpay_order['id']
-        )
+            status__in=['PENDING_ORDER', 'PENDING']
+        ).values('id', 'status').first()
+        if pending_sub is None or pending_sub['status'] != 'PENDING_ORDER':
+            return Response({
+                'success': False,
+                'message': 'Pending subscription already exists',
+                'subscription_id': pending_sub and pending_sub['id']
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Its order was never created (or is still queued); enqueue it again and
+        # hand back the same checkout link
+        create_subscription_order.delay(pending_sub['id'])
+        return Response({
+            'success': True,
+            'message': 'Payment link already exists',
+            'data': {
+                'subscription_id': pending_sub['id'],
+                'status': pending_sub['status'],
+                'payment_url': SUBSCRIPTION_CHECKOUT_URL.format(pending_sub['id'])
+            }
+        }, status=status.HTTP_200_OK)
+    
+    try:
+        create_subscription_order.delay(subscription.id)
         
         # Return payment checkout URL
-        payment_url = f"{settings.BASE_URL}/api/providers/subscription/checkout/{subscription.id}"
+        payment_url = SUBSCRIPTION_CHECKOUT_URL.format(subscription.id)
         
         return Response({
             'success': True,
             'message': 'Payment link created successfully',
             'data': {
                 'subscription_id': subscription.id,
+                'status': subscription.status,
                 'payment_url': payment_url,
                 'plan_type': plan_type,
                 'amount': float(amount),
@@ -540,6 +685,7 @@ def create_subscription_payment(request):
         }, status=status.HTTP_201_CREATED)
         
     except Exception as e:
+        subscription.delete()
         return Response({
             'success': False,
             'message': f'Payment error: {str(e)}'
@@ -550,106 +696,104 @@ def create_subscription_payment(request):
 def subscription_payment_checkout(request, subscription_id):
     """Render Razorpay checkout page for subscription"""
     try:
-        subscription = ProviderSubscription.objects.get(
+        subscription = ProviderSubscription.objects.select_related('provider__user').get(
             id=subscription_id,
-            status='PENDING'
+            status__in=['PENDING_ORDER', 'PENDING', 'FAILED']
         )
+        order_pending = subscription.status == 'PENDING_ORDER'
+        attempt = checkout_refresh_attempt(request)
+        if subscription.status == 'FAILED' or (order_pending and attempt >= CHECKOUT_MAX_REFRESHES):
+            return render_message_page('payment_error.html', ORDER_FAILED_MESSAGE)
+        
         provider = subscription.provider
         user = provider.user
         
         context = {
-            'razorpay_key': settings.RAZORPAY_KEY_ID,
+            'order_pending': order_pending,
+            'next_attempt': attempt + 1,
+            'razorpay_key': RAZORPAY_KEY_ID,
             'order_id': subscription.gateway_order_id,
-            'amount': int(subscription.amount * 100),  # Convert to paise
+            'amount': to_paise(subscription.amount),
             'currency': 'INR',
             'user_name': user.name,
             'user_email': user.email or '',
             'user_phone': user.phone,
-            'callback_url': f"{settings.BASE_URL}/api/providers/subscription/callback",
+            'callback_url': SUBSCRIPTION_CALLBACK_URL,
             'subscription_id': subscription.id,
             'plan_type': subscription.get_plan_type_display(),
         }
         
-        return render(request, 'razorpay_checkout.html', context)
+        return render_page(request, 'razorpay_checkout.html', context)
         
     except ProviderSubscription.DoesNotExist:
-        return render(request, 'payment_error.html', {
-            'error_message': 'Subscription not found or already processed',
-            'frontend_url': settings.FRONTEND_URL
-        })
+        return render_message_page('payment_error.html', 'Subscription not found or already processed')
 
 
 @csrf_exempt
 def subscription_payment_callback(request):
     """Handle Razorpay payment callback for subscription"""
     if request.method != 'POST':
-        return render(request, 'payment_error.html', {
-            'error_message': 'Invalid request method',
-            'frontend_url': settings.FRONTEND_URL
-        })
+        return render_message_page('payment_error.html', 'Invalid request method')
     
     razorpay_order_id = request.POST.get('razorpay_order_id')
     razorpay_payment_id = request.POST.get('razorpay_payment_id')
     razorpay_signature = request.POST.get('razorpay_signature')
     
     if not all([razorpay_order_id, razorpay_payment_id, razorpay_signature]):
-        return render(request, 'payment_error.html', {
-            'error_message': 'Missing payment details',
-            'frontend_url': settings.FRONTEND_URL
-        })
+        return render_message_page('payment_error.html', 'Missing payment details')
     
     try:
         # Verify signature
-        generated_signature = hmac.new(
-            settings.RAZORPAY_KEY_SECRET.encode(),
-            f"{razorpay_order_id}|{razorpay_payment_id}".encode(),
-            hashlib.sha256
-        ).hexdigest()
-        
-        if generated_signature != razorpay_signature:
-            return render(request, 'payment_failure.html', {
-                'error_message': 'Payment verification failed',
-                'frontend_url': settings.FRONTEND_URL
-            })
-        
-        # Find subscription record
-        subscription = ProviderSubscription.objects.filter(
-            gateway_order_id=razorpay_order_id,
-            status='PENDING'
-        ).first()
-        
-        if not subscription:
-            return render(request, 'payment_error.html', {
-                'error_message': 'Subscription record not found',
-                'frontend_url': settings.FRONTEND_URL
-            })
-        
-        # Update subscription status
-        subscription.status = 'ACTIVE'
-        subscription.gateway_payment_id = razorpay_payment_id
-        subscription.start_date = timezone.now()
-        
-        # Calculate end date
-        if subscription.plan_type == 'MONTHLY':
-            subscription.end_date = subscription.start_date + relativedelta(months=1)
-        else:  # YEARLY
-            subscription.end_date = subscription.start_date + relativedelta(years=1)
+        if not verify_payment_signature(razorpay_order_id, razorpay_payment_id, razorpay_signature):
+            return render_message_page('payment_failure.html', 'Payment verification failed')
         
-        subscription.save()
+        # Lock the pending row so duplicate/retried callbacks are processed once
+        with transaction.atomic():
+            subscription = ProviderSubscription.objects.select_for_update(
+                of=('self',)
+            ).select_related('provider').filter(
+                gateway_order_id=razorpay_order_id,
+                status='PENDING'
+            ).first()
+            
+            if not subscription:
+                return render_message_page('payment_error.html', 'Subscription record not found')
+            
+            # Update subscription status
+            subscription.status = 'ACTIVE'
+            subscription.gateway_payment_id = razorpay_payment_id
+            subscription.start_date = timezone.now()
+            
+            # Calculate end date
+            if subscription.plan_type == 'MONTHLY':
+                subscription.end_date = subscription.start_date + relativedelta(months=1)
+            else:  # YEARLY
+                subscription.end_date = subscription.start_date + relativedelta(years=1)
+            
+            updated = ProviderSubscription.objects.filter(
+                pk=subscription.pk,
+                status='PENDING'
+            ).update(
+                status=subscription.status,
+                gateway_payment_id=subscription.gateway_payment_id,
+                start_date=subscription.start_date,
+                end_date=subscription.end_date,
+                updated_at=subscription.start_date
+            )
+            
+            if not updated:
+                return render_message_page('payment_error.html', 'Subscription already processed')
         
         provider = subscription.provider
         
-        return render(request, 'subscription_success.html', {
+        return render_page(request, 'subscription_success.html', {
             'provider': provider,
             'subscription': subscription,
-            'frontend_url': settings.FRONTEND_URL
+            'frontend_url': FRONTEND_URL
         })
         
     except Exception as e:
-        return render(request, 'payment_error.html', {
-            'error_message': f'Error: {str(e)}',
-            'frontend_url': settings.FRONTEND_URL
-        })
+        return render_message_page('payment_error.html', f'Error: {str(e)}')
 
 
 @api_view(['GET'])
@@ -658,30 +802,30 @@ def check_subscription_status(request, subscription_id):
     """Check subscription payment status"""
     user = request.user
     
-    try:
-        provider = user.provider_profile
-        subscription = ProviderSubscription.objects.get(
-            id=subscription_id,
-            provider=provider
-        )
-        
+    # Filter through the provider FK directly instead of loading provider_profile first
+    subscription = ProviderSubscription.objects.filter(
+        id=subscription_id,
+        provider__user=user
+    ).only(*SUBSCRIPTION_SERIALIZER_COLUMNS).first()
+    
+    if subscription:
         serializer = ProviderSubscriptionSerializer(subscription)
         
         return Response({
             'success': True,
             'data': serializer.data
         })
-        
-    except ServiceProvider.DoesNotExist:
+    
+    if not ServiceProvider.objects.filter(user=user).exists():
         return Response({
             'success': False,
             'message': 'Provider profile not found'
         }, status=status.HTTP_404_NOT_FOUND)
-    except ProviderSubscription.DoesNotExist:
-        return Response({
-            'success': False,
-            'message': 'Subscription not found'
-        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'success': False,
+        'message': 'Subscription not found'
+    }, status=status.HTTP_404_NOT_FOUND)
 
 
 @api_view(['GET'])
@@ -690,28 +834,27 @@ def get_active_subscription(request):
     """Get user's active subscription"""
     user = request.user
     
-    try:
-        provider = user.provider_profile
-        subscription = ProviderSubscription.objects.filter(
-            provider=provider,
-            status='ACTIVE',
-            end_date__gte=timezone.now()
-        ).order_by('-created_at').first()
-        
-        if subscription:
-            serializer = ProviderSubscriptionSerializer(subscription)
-            return Response({
-                'success': True,
-                'data': serializer.data
-            })
-        else:
-            return Response({
-                'success': False,
-                'message': 'No active subscription found'
-            }, status=status.HTTP_404_NOT_FOUND)
-            
-    except ServiceProvider.DoesNotExist:
+    subscription = ProviderSubscription.objects.filter(
+        provider__user=user,
+        status='ACTIVE',
+        end_date__gte=timezone.now()
+    ).only(*SUBSCRIPTION_SERIALIZER_COLUMNS).order_by('-created_at').first()
+    
+    if subscription:
+        serializer = ProviderSubscriptionSerializer(subscription)
+        return Response({
+            'success': True,
+            'data': serializer.data
+        })
+    
+    # Only the miss path needs to tell "no profile" from "no subscription"
+    if not ServiceProvider.objects.filter(user=user).exists():
         return Response({
             'success': False,
             'message': 'Provider profile not found'
-        }, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'success': False,
+        'message': 'No active subscription found'
+    }, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
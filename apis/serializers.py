@@ -1,13 +1,37 @@
-from providers.models import GovernmentService, ServiceQuestion, ServiceQuestionAnswer
+from providers.models import GovernmentService, ServiceProvider, ServiceQuestion, ServiceQuestionAnswer
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from accounts.models import UserProfile, RegistrationPayment
-from django.utils import timezone
+from django.db import IntegrityError, models, transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
 User = get_user_model()
+import copy
 import random
 import string
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+CAPTAIN_CODE_ATTEMPTS = 3
+_DIGITS = string.digits
+_RNG = random.SystemRandom()
+
+def normalize_contact(data):
+    """Stripped phone and email from serializer data, with blanks as None"""
+    phone = (data.get('phone') or '').strip()
+    email = (data.get('email') or '').strip()
+    return phone or None, email or None
+
+
+class CachedFieldsMixin:
+    """Build a ModelSerializer's fields once per class; each instance gets deep copies"""
+    _fields_cache = {}
+
+    def get_fields(self):
+        cls = type(self)
+        if cls not in self._fields_cache:
+            self._fields_cache[cls] = super().get_fields()
+        return copy.deepcopy(self._fields_cache[cls])
+
+
+class UserRegistrationSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
     phone = serializers.CharField(required=False, allow_blank=True)
     email = serializers.EmailField(required=False, allow_blank=True)
@@ -19,70 +43,85 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ['phone', 'email', 'name', 'password', 'is_captain', 'is_provider']
     
     def validate(self, data):
-        phone = data.get('phone', '').strip() if data.get('phone') else ''
-        email = data.get('email', '').strip() if data.get('email') else ''
+        phone, email = normalize_contact(data)
         
         if not phone and not email:
             raise serializers.ValidationError("Either phone number or email is required")
         
+        # One query covers both uniqueness checks (at most one row can match each field)
+        lookup = Q()
+        if phone:
+            lookup |= Q(phone=phone)
+        if email:
+            lookup |= Q(email=email)
+        
+        errors = {}
+        for existing_phone, existing_email in User.objects.filter(lookup).values_list('phone', 'email')[:2]:
+            if phone and existing_phone == phone:
+                errors['phone'] = ["Phone number already registered"]
+            if email and existing_email == email:
+                errors['email'] = ["Email already registered"]
+        
+        if errors:
+            raise serializers.ValidationError(errors)
+        
+        # Store the normalized values so create() can use them as-is
+        data['phone'] = phone
+        data['email'] = email
+        
         return data
     
-    def validate_phone(self, value):
-        if value:
-            value = value.strip()
-            if User.objects.filter(phone=value).exists():
-                raise serializers.ValidationError("Phone number already registered")
-        return value
+    def generate_captain_code(self):
+        """Generate a random captain code (uniqueness is enforced by the DB on insert)"""
+        return 'CAP' + ''.join(_RNG.choices(_DIGITS, k=8))
     
-    def validate_email(self, value):
-        if value:
-            value = value.strip()
-            if User.objects.filter(email=value).exists():
-                raise serializers.ValidationError("Email already registered")
-        return value
-    
-    def generate_unique_captain_code(self):
-        """Generate a unique captain code"""
-        while True:
-            code = 'CAP' + ''.join(random.choices(string.digits, k=8))
-            if not User.objects.filter(captain_code=code).exists():
-                return code
+    def save_with_captain_code(self, user):
+        """Insert a captain, retrying with a new code on the rare unique-constraint clash"""
+        for attempt in range(CAPTAIN_CODE_ATTEMPTS):
+            user.captain_code = self.generate_captain_code()
+            try:
+                # Savepoint so a clash doesn't abort the surrounding transaction
+                with transaction.atomic():
+                    user.save()
+                return
+            except IntegrityError:
+                if attempt == CAPTAIN_CODE_ATTEMPTS - 1:
+                    raise
     
     def create(self, validated_data):
         password = validated_data.pop('password', None)
         is_captain = validated_data.pop('is_captain', False)
         is_provider = validated_data.pop('is_provider', False)
         
-        # Clean up empty strings to None
-        phone = validated_data.get('phone')
-        email = validated_data.get('email')
-        
-        validated_data['phone'] = phone.strip() if phone else None
-        validated_data['email'] = email.strip() if email else None
-        
         # Set role flags based on logic
         validated_data['is_captain'] = is_captain
         validated_data['is_user'] = not (is_captain or is_provider)
         validated_data['is_provider_register'] = is_provider  # NEW: Store provider registration intent
         
-        # Generate captain code if is_captain is True
-        if is_captain:
-            validated_data['captain_code'] = self.generate_unique_captain_code()
-            validated_data['admin_verified'] = False  # Captain needs admin verification
-        else:
-            validated_data['admin_verified'] = True  # Regular users and providers don't need admin verification
-        
-        user = User.objects.create(**validated_data)
+        # Captain needs admin verification; regular users and providers don't
+        validated_data['admin_verified'] = not is_captain
         
+        # Hash the password up front so the user row is written with a single INSERT
+        user = User(**validated_data)
         if password:
             user.set_password(password)
-            user.save()
         
-        # Create profile automatically
-        UserProfile.objects.create(user=user)
+        # User + profile commit together (no orphan users if profile creation fails)
+        with transaction.atomic():
+            if is_captain:
+                self.save_with_captain_code(user)
+            else:
+                user.save()
+            
+            # Create profile automatically
+            UserProfile.objects.create(user=user)
         
         # DON'T create ServiceProvider here - it will be created via create_or_update_provider_profile API
         
+        # A brand-new user has no provider profile or payments yet; UserSerializer reads these
+        user.has_provider_profile = False
+        user.latest_payment_status = None
+        
         return user
 
 class UserLoginSerializer(serializers.Serializer):
@@ -91,15 +130,56 @@ class UserLoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
     
     def validate(self, data):
-        phone = data.get('phone', '').strip() if data.get('phone') else ''
-        email = data.get('email', '').strip() if data.get('email') else ''
+        phone, email = normalize_contact(data)
         
         if not phone and not email:
             raise serializers.ValidationError("Either phone number or email is required")
         
+        # Normalized once here; the login view reads these directly
+        data['phone'] = phone
+        data['email'] = email
+        
         return data
 
-class UserSerializer(serializers.ModelSerializer):
+def annotate_user_status(queryset):
+    """Annotate the provider flag and latest payment status read by UserSerializer"""
+    latest_payment = (
+        RegistrationPayment.objects
+        .filter(user=OuterRef('pk'))
+        .order_by('-created_at')
+        .values('status')[:1]
+    )
+    return queryset.annotate(
+        has_provider_profile=Exists(ServiceProvider.objects.filter(user=OuterRef('pk'))),
+        latest_payment_status=Subquery(latest_payment),
+    )
+
+
+def load_user_status(obj):
+    """Fill both status annotations with one query when the queryset didn't provide them"""
+    if hasattr(obj, 'latest_payment_status'):
+        return obj
+
+    if User.provider_profile.is_cached(obj):
+        # Relation already loaded (select_related / earlier access): read it, don't re-check
+        obj.has_provider_profile = getattr(obj, 'provider_profile', None) is not None
+        obj.latest_payment_status = (
+            obj.registration_payments
+            .order_by('-created_at')
+            .values_list('status', flat=True)
+            .first()
+        )
+        return obj
+
+    row = annotate_user_status(User.objects.filter(pk=obj.pk)).values(
+        'has_provider_profile', 'latest_payment_status'
+    ).first() or {}
+    obj.has_provider_profile = row.get('has_provider_profile', False)
+    obj.latest_payment_status = row.get('latest_payment_status')
+    return obj
+
+
+class UserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     is_provider = serializers.SerializerMethodField()
     registration_payment_status = serializers.SerializerMethodField()
 
@@ -122,22 +202,51 @@ class UserSerializer(serializers.ModelSerializer):
         ]
 
     def get_is_provider(self, obj):
-        return hasattr(obj, 'provider_profile')
+        return load_user_status(obj).has_provider_profile
 
     def get_registration_payment_status(self, obj):
-        payment = (
-            obj.registration_payments
-            .order_by('-created_at')
-            .first()
-        )
-        return payment.status if payment else None
+        return load_user_status(obj).latest_payment_status
+
+
+_DATETIME_FIELD = serializers.DateTimeField()
+
+
+def user_to_dict(user):
+    """Same output as UserSerializer(user).data, built directly for the hot /auth/me path"""
+    load_user_status(user)
+    return {
+        'id': user.id,
+        'phone': user.phone,
+        'email': user.email,
+        'name': user.name,
+        'is_active': user.is_active,
+        'is_admin': user.is_admin,
+        'is_captain': user.is_captain,
+        'is_user': user.is_user,
+        'is_provider_register': user.is_provider_register,
+        'captain_code': user.captain_code,
+        'admin_verified': user.admin_verified,
+        'date_joined': _DATETIME_FIELD.to_representation(user.date_joined),
+        'is_provider': user.has_provider_profile,
+        'registration_payment_status': user.latest_payment_status,
+    }
+
+
+class FastListSerializer(serializers.ListSerializer):
+    """ListSerializer that looks up the child's to_representation once per list"""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        to_representation = self.child.to_representation
+        return [to_representation(item) for item in iterable]
 
 
-class RegistrationPaymentSerializer(serializers.ModelSerializer):
+class RegistrationPaymentSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = RegistrationPayment
-        fields = ['id', 'amount', 'status', 'gateway_order_id', 'created_at']
-        read_only_fields = ['id', 'status', 'created_at']
+        fields = ('id', 'amount', 'status', 'gateway_order_id', 'created_at')
+        read_only_fields = ('id', 'status', 'created_at')
+        list_serializer_class = FastListSerializer
 
 class ServiceQuestionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -1,25 +1,26 @@
 import re
+import threading
 from google import genai
+from google.genai import types
 from django.conf import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-class GeminiAIService:
-    def __init__(self):
-        self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        self.model_name = "gemini-2.5-flash"  # Current stable
-        self.fallback_model = "gemini-2.0-flash"
-
-    def get_prompt_template(self, language='english'):
-        """
-        Enhanced Prompt Engineering:
-        - Enforces 'HTML Fragment' output (No <html>, <head>, <body>).
-        - Adds specific CSS classes for frontend styling hooks.
-        - Preserves your domain logic for BharatAbhiyan.
-        """
-        
-        base_context = """You are an AI expert for BharatAbhiyan, an Indian government services platform.
+# Response clean-up patterns, compiled once at import. Markdown fences and
+# full-document wrappers (<!DOCTYPE>, <html>, <head>, <body>) are stripped in one pass.
+_WRAPPERS = re.compile(
+    r'^```(?:html)?\s*'
+    r'|```$'
+    r'|<!DOCTYPE html>'
+    r'|</?html.*?>'
+    r'|<head>.*?</head>'
+    r'|</?body.*?>',
+    re.IGNORECASE | re.DOTALL
+)
+_BLANK_LINES = re.compile(r'\n\s*\n')
+
+_BASE_CONTEXT = """You are an AI expert for BharatAbhiyan, an Indian government services platform.
 
 MISSION:
 Provide a precise, actionable guide for government schemes.
@@ -42,12 +43,54 @@ CONTENT STRUCTURE:
 4. **Application Process:** Numbered, step-by-step actionable instructions.
 5. **Official Links:** Direct `<a href="...">` links to portals (must use target="_blank")."""
 
-        language_instructions = {
-            'english': "\n\nLanguage: Respond in professional, simple English.",
-            'hindi': "\n\nLanguage: Respond in clear Hindi (Devanagari). Use English for technical terms (e.g., 'OTP', 'Captcha')."
+_LANGUAGE_INSTRUCTIONS = {
+    'english': "\n\nLanguage: Respond in professional, simple English.",
+    'hindi': "\n\nLanguage: Respond in clear Hindi (Devanagari). Use English for technical terms (e.g., 'OTP', 'Captcha')."
+}
+
+# Full prompt per language, built once and shared by every service instance
+PROMPT_TEMPLATES = {
+    language: _BASE_CONTEXT + instruction
+    for language, instruction in _LANGUAGE_INSTRUCTIONS.items()
+}
+
+# Output cap per language: a full guide is ~1200 tokens in English, while
+# Devanagari needs noticeably more tokens for the same text
+MAX_OUTPUT_TOKENS = {
+    'english': 1400,
+    'hindi': 2048,
+}
+
+
+class GeminiAIService:
+    def __init__(self):
+        self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
+        self.model_name = "gemini-2.5-flash"  # Current stable
+        self.fallback_model = "gemini-2.0-flash"
+
+        # Optimized config for factual guides (constant per language, so built once)
+        self.generation_configs = {
+            language: types.GenerateContentConfig(
+                temperature=0.3, # Lower temperature = more precise formatting
+                top_p=0.8,
+                top_k=20,
+                max_output_tokens=max_tokens,
+                response_mime_type='text/plain',
+            )
+            for language, max_tokens in MAX_OUTPUT_TOKENS.items()
         }
-        
-        return base_context + language_instructions.get(language.lower(), language_instructions['english'])
+
+    def get_generation_config(self, language='english'):
+        return self.generation_configs.get(language.lower(), self.generation_configs['english'])
+
+    def get_prompt_template(self, language='english'):
+        """
+        Enhanced Prompt Engineering:
+        - Enforces 'HTML Fragment' output (No <html>, <head>, <body>).
+        - Adds specific CSS classes for frontend styling hooks.
+        - Preserves your domain logic for BharatAbhiyan.
+        """
+        return PROMPT_TEMPLATES.get(language.lower(), PROMPT_TEMPLATES['english'])
     
     def format_user_query(self, question, language='english'):
         prompt_template = self.get_prompt_template(language)
@@ -65,25 +108,24 @@ Generate the HTML guide now:"""
         if not text: 
             return ""
 
-        # 1. Remove Markdown code blocks (```html ... ```)
-        text = re.sub(r'^```html\s*', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'^```\s*', '', text)
-        text = re.sub(r'```$', '', text)
-
-        # 2. Remove full HTML document structure if the AI hallucinates it
-        # (This removes <!DOCTYPE>, <html>, <head>, <body> and their closing tags)
-        text = re.sub(r'<!DOCTYPE html>', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'<html.*?>', '', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'</html>', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'<head>.*?</head>', '', text, flags=re.IGNORECASE | re.DOTALL) # Remove head/styles completely
-        text = re.sub(r'<body.*?>', '', text, flags=re.IGNORECASE | re.DOTALL)
-        text = re.sub(r'</body>', '', text, flags=re.IGNORECASE)
+        # 1. Remove Markdown code blocks (```html ... ```) and
+        # 2. full HTML document structure if the AI hallucinates it
+        # (<!DOCTYPE>, <html>, <head> with its styles, <body> and their closing tags)
+        text = _WRAPPERS.sub('', text)
 
         # 3. Collapse multiple newlines into a single newline to fix "extra \n\n\n"
-        text = re.sub(r'\n\s*\n', '\n', text)
+        text = _BLANK_LINES.sub('\n', text)
 
         return text.strip()
 
+    def _clean_fragment(self, text):
+        """
+        Best-effort _clean_response for a streamed piece (no strip() between pieces).
+        Patterns only match within the piece, so a <head> block or a run of blank
+        lines split across pieces is not removed; use _clean_response on the full text.
+        """
+        return _BLANK_LINES.sub('\n', _WRAPPERS.sub('', text))
+
     def _generate(self, model, prompt, config):
         return self.client.models.generate_content(
             model=model,
@@ -91,15 +133,28 @@ Generate the HTML guide now:"""
             config=config
         )
 
+    def _build_result(self, response, language):
+        return self.build_result_from_text(response.text if response else None, language)
+
+    def build_result_from_text(self, text, language):
+        if not text:
+            return {'success': False, 'message': 'Empty response from AI'}
+        
+        # Clean the response
+        cleaned_html = self._clean_response(text)
+        
+        # Wrap in a scoped class for your frontend
+        final_html = f'<div class="bharatabhiyan-ai-content">{cleaned_html}</div>'
+        
+        return {
+            'success': True,
+            'response': final_html,
+            'language': language
+        }
+
     def get_ai_guide(self, question, language='english'):
         formatted_prompt = self.format_user_query(question, language)
-        
-        # Optimized config for factual guides
-        generation_config = types.GenerateContentConfig(
-            temperature=0.3, # Lower temperature = more precise formatting
-            top_p=0.8,
-            max_output_tokens=2048,
-        )
+        generation_config = self.get_generation_config(language)
         
         try:
             # Try Primary
@@ -112,17 +167,75 @@ Generate the HTML guide now:"""
             except Exception as e2:
                 return {'success': False, 'message': f'AI Service Unavailable: {str(e2)}'}
 
-        if not response or not response.text:
-            return {'success': False, 'message': 'Empty response from AI'}
-        
-        # Clean the response
-        cleaned_html = self._clean_response(response.text)
-        
-        # Wrap in a scoped class for your frontend
-        final_html = f'<div class="bharatabhiyan-ai-content">{cleaned_html}</div>'
-        
-        return {
-            'success': True,
-            'response': final_html,
-            'language': language
-        }
\ No newline at end of file
+        return self._build_result(response, language)
+
+    def _stream_with_fallback(self, prompt, config):
+        # Sync client: google-genai's Models.generate_content_stream is a plain
+        # generator, so it streams under WSGI and needs no event loop.
+        # Errors surface on the first chunk, so fall back only if nothing was produced yet
+        for model in (self.model_name, self.fallback_model):
+            stream = self.client.models.generate_content_stream(
+                model=model,
+                contents=prompt,
+                config=config
+            )
+            try:
+                first = next(stream)
+            except StopIteration:
+                return
+            except Exception as e:
+                if model == self.fallback_model:
+                    raise
+                logger.warning(f"Primary model failed: {e}. Trying fallback.")
+                continue
+
+            yield first
+            yield from stream
+            return
+
+    def stream_ai_guide(self, question, language='english', raw_parts=None):
+        """
+        Yield the guide as HTML pieces while the model generates it, flushed on line
+        boundaries and cleaned per piece (see _clean_fragment). When raw_parts is a
+        list, the uncleaned model text is appended to it for build_result_from_text.
+        """
+        formatted_prompt = self.format_user_query(question, language)
+        chunks = self._stream_with_fallback(formatted_prompt, self.get_generation_config(language))
+
+        first = next(chunks, None)
+        if first is None:
+            return
+
+        # Same scoped wrapper as the non-streaming response
+        yield '<div class="bharatabhiyan-ai-content">'
+
+        pending = first.text or ''
+        if raw_parts is not None:
+            raw_parts.append(pending)
+        for chunk in chunks:
+            text = chunk.text or ''
+            if raw_parts is not None:
+                raw_parts.append(text)
+            pending += text
+            complete, newline, pending = pending.rpartition('\n')
+            if newline:
+                yield self._clean_fragment(complete + newline)
+
+        if pending:
+            yield self._clean_fragment(pending)
+        yield '</div>'
+
+
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+
+def get_gemini_service():
+    """Shared GeminiAIService, created on first use so its HTTP connections are reused"""
+    global _shared_service
+    if _shared_service is None:
+        # Threaded workers can race on the first request; build exactly one client
+        with _shared_service_lock:
+            if _shared_service is None:
+                _shared_service = GeminiAIService()
+    return _shared_service
@@ -0,0 +1,57 @@
+import hmac
+import razorpay
+import requests
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def _build_session():
+    """Keep-alive session so Razorpay calls reuse pooled TCP/TLS connections"""
+    session = requests.Session()
+    # Connection failures are retried for every method (nothing reached Razorpay);
+    # gateway errors only for GET, so an order POST is never sent twice
+    retries = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=['GET'],
+    )
+    session.mount('https://', HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=retries))
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+# Encoded once; used as the HMAC key for every signature check
+RAZORPAY_SECRET_BYTES = settings.RAZORPAY_KEY_SECRET.encode()
+
+# Shared Razorpay client (used by request handlers and background tasks)
+razorpay_client = razorpay.Client(
+    session=_build_session(),
+    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+)
+
+
+def to_paise(amount):
+    """Convert a rupee amount (Decimal) to the integer paise Razorpay expects"""
+    return int((Decimal(amount) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def verify_payment_signature(order_id, payment_id, signature):
+    """Check a Razorpay checkout signature (HMAC-SHA256 of "order_id|payment_id")"""
+    # Anything but a plain 64-char hex digest is rejected up front (fromhex would
+    # also accept embedded spaces, and raises TypeError for non-strings)
+    if not isinstance(signature, str) or len(signature) != 64:
+        return False
+    try:
+        expected = bytes.fromhex(signature)
+    except ValueError:
+        return False
+
+    generated = hmac.digest(
+        RAZORPAY_SECRET_BYTES,
+        f"{order_id}|{payment_id}".encode(),
+        'sha256'
+    )
+    return hmac.compare_digest(generated, expected)
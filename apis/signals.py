@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from accounts.models import RegistrationPayment, User
+from providers.models import (
+    GovernmentService,
+    ServiceArea,
+    ServiceCategory,
+    ServiceProvider,
+    ServiceQuestion,
+    ServiceQuestionAnswer,
+    ServiceType,
+)
+from .caching import invalidate_payment_status, invalidate_reference_data, invalidate_user_payload
+
+
+@receiver([post_save, post_delete], sender=ServiceCategory)
+@receiver([post_save, post_delete], sender=ServiceType)
+@receiver([post_save, post_delete], sender=ServiceArea)
+@receiver([post_save, post_delete], sender=GovernmentService)
+@receiver([post_save, post_delete], sender=ServiceQuestion)
+@receiver([post_save, post_delete], sender=ServiceQuestionAnswer)
+def invalidate_dropdown_cache(sender, **kwargs):
+    invalidate_reference_data()
+
+
+# The /auth/me payload includes is_provider and registration_payment_status,
+# so provider profiles and registration payments clear it as well
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_user_payload(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=ServiceProvider)
+@receiver([post_save, post_delete], sender=RegistrationPayment)
+def invalidate_owner_user_cache(sender, instance, **kwargs):
+    invalidate_user_payload(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=RegistrationPayment)
+def invalidate_payment_status_cache(sender, instance, **kwargs):
+    invalidate_payment_status(instance.pk)
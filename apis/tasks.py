@@ -0,0 +1,91 @@
+from celery import shared_task
+from django.utils import timezone
+from accounts.models import RegistrationPayment
+from providers.models import ProviderSubscription
+from .services.razorpay_service import razorpay_client, to_paise
+
+ORDER_RETRY_BASE_DELAY = 5  # seconds
+
+
+def retry_countdown(retries):
+    """Exponential backoff for Razorpay order retries: 5s, 10s, 20s"""
+    return ORDER_RETRY_BASE_DELAY * 2 ** retries
+
+
+@shared_task(bind=True, max_retries=3)
+def create_subscription_order(self, subscription_id):
+    """Create the Razorpay order for a subscription and mark it ready for checkout"""
+    subscription = ProviderSubscription.objects.filter(
+        id=subscription_id,
+        status='PENDING_ORDER'
+    ).first()
+
+    if not subscription:
+        return
+
+    try:
+        razorpay_order = razorpay_client.order.create({
+            'amount': to_paise(subscription.amount),
+            'currency': 'INR',
+            'payment_capture': 1,
+            'notes': {
+                'provider_id': str(subscription.provider_id),
+                'plan_type': subscription.plan_type,
+                'payment_type': 'provider_subscription'
+            }
+        })
+    except Exception as e:
+        if self.request.retries >= self.max_retries:
+            # Give up so the checkout page shows an error and the provider can
+            # start a fresh subscription
+            subscription.status = 'FAILED'
+            subscription.save(update_fields=['status', 'updated_at'])
+            return
+        raise self.retry(exc=e, countdown=retry_countdown(self.request.retries))
+
+    # Guarded on PENDING_ORDER so a re-enqueued duplicate can't swap the order
+    ProviderSubscription.objects.filter(
+        pk=subscription.pk,
+        status='PENDING_ORDER'
+    ).update(
+        gateway_order_id=razorpay_order['id'],
+        status='PENDING',
+        updated_at=timezone.now()
+    )
+
+
+@shared_task(bind=True, max_retries=3)
+def create_registration_order(self, payment_id):
+    """Create the Razorpay order for a registration payment and attach it for checkout"""
+    payment = RegistrationPayment.objects.filter(
+        id=payment_id,
+        status='PENDING',
+        gateway_ref=''
+    ).first()
+
+    if not payment:
+        return
+
+    try:
+        razorpay_order = razorpay_client.order.create({
+            'amount': payment.amount_paise,
+            'currency': 'INR',
+            'payment_capture': 1,
+            'notes': {
+                'user_id': str(payment.user_id),
+                'payment_type': 'registration'
+            }
+        })
+    except Exception as e:
+        if self.request.retries >= self.max_retries:
+            # Give up so the next create-link call starts a fresh payment
+            payment.status = 'FAILED'
+            payment.save(update_fields=['status', 'updated_at'])
+            return
+        raise self.retry(exc=e, countdown=retry_countdown(self.request.retries))
+
+    # Guarded on an empty gateway_ref so a duplicate delivery can't swap the order
+    RegistrationPayment.objects.filter(pk=payment.pk, gateway_ref='').update(
+        gateway_ref=razorpay_order['id'],
+        updated_at=timezone.now()
+    )
@@ -1,3 +1,36 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from providers.models import GovernmentService
+
+
+class GovernmentServiceListTests(TestCase):
+    url = '/api/government-services/'
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            GovernmentService.objects.create(name=f'Scheme {i}', description=f'About scheme {i}')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_limit_offset_returns_page(self):
+        response = self.client.get(self.url, {'limit': 2, 'offset': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([s['name'] for s in response.data['results']], ['Scheme 1', 'Scheme 2'])
+
+    def assertFullList(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+
+    def test_non_numeric_limit_returns_full_list(self):
+        self.assertFullList(self.client.get(self.url, {'limit': 'abc'}))
+
+    def test_zero_limit_returns_full_list(self):
+        self.assertFullList(self.client.get(self.url, {'limit': 0}))
+
+    def test_empty_limit_returns_full_list(self):
+        self.assertFullList(self.client.get(self.url, {'limit': ''}))
@@ -1,42 +1,65 @@
-from django.urls import path
+from django.urls import include, path
 from . import views, provider_views
 
-urlpatterns = [
+# Routes are grouped by prefix with include([...]) so the resolver only walks
+# the patterns of the matching bucket. Paths and names are unchanged.
+
+auth_patterns = [
     # Authentication endpoints
-    path('auth/register', views.register, name='register'),
-    path('auth/login', views.login, name='login'),
-    path('auth/me', views.me, name='me'),
-    path('captain/submit-verification/', views.submit_captain_verification, name='submit-captain-verification'),
-    
+    path('register', views.register, name='register'),
+    path('login', views.login, name='login'),
+    path('me', views.me, name='me'),
+]
+
+registration_payment_patterns = [
     # User Registration Payment
-    path('payments/registration/create-link', views.create_payment_link, name='create_payment_link'),
-    path('payments/registration/checkout/<int:payment_id>', views.payment_checkout, name='payment_checkout'),
-    path('payments/registration/callback', views.payment_callback, name='payment_callback'),
-    path('payments/registration/status/<int:payment_id>', views.check_payment_status, name='check_payment_status'),
-    
+    path('create-link', views.create_payment_link, name='create_payment_link'),
+    path('checkout/<int:payment_id>', views.payment_checkout, name='payment_checkout'),
+    path('callback', views.payment_callback, name='payment_callback'),
+    path('status/<int:payment_id>', views.check_payment_status, name='check_payment_status'),
+]
+
+provider_subscription_patterns = [
+    # Provider Subscription & Payment
+    path('create', provider_views.create_subscription_payment, name='create_subscription_payment'),
+    path('checkout/<int:subscription_id>', provider_views.subscription_payment_checkout, name='subscription_payment_checkout'),
+    path('callback', provider_views.subscription_payment_callback, name='subscription_payment_callback'),
+    path('status/<int:subscription_id>', provider_views.check_subscription_status, name='check_subscription_status'),
+    path('active', provider_views.get_active_subscription, name='get_active_subscription'),
+]
+
+provider_patterns = [
     # Provider Helper APIs (dropdowns/lists)
-    path('providers/categories', provider_views.get_service_categories, name='get_service_categories'),
-    path('providers/service-types', provider_views.get_service_types, name='get_service_types'),
-    path('providers/service-areas', provider_views.get_service_areas, name='get_service_areas'),
+    path('categories', provider_views.get_service_categories, name='get_service_categories'),
+    path('service-types', provider_views.get_service_types, name='get_service_types'),
+    path('service-areas', provider_views.get_service_areas, name='get_service_areas'),
+    path('bootstrap', provider_views.get_provider_bootstrap, name='get_provider_bootstrap'),
+    path('by-area/', provider_views.get_services_and_providers, name='providers-by-area'),
+
+    # Provider Registration APIs
+    path('profile', provider_views.create_or_update_provider_profile, name='create_or_update_provider_profile'),
+    path('profile/me', provider_views.get_provider_profile, name='get_provider_profile'),
+    path('profile/submit', provider_views.submit_provider_application, name='submit_provider_application'),
+
+    path('subscription/', include(provider_subscription_patterns)),
+]
+
+captain_patterns = [
+    path('submit-verification/', views.submit_captain_verification, name='submit-captain-verification'),
+    path('pending-providers/', views.list_pending_providers, name='list-pending-providers'),
+    path('verify-provider/', views.verify_provider_service, name='verify-provider-service'),
+]
+
+urlpatterns = [
+    path('auth/', include(auth_patterns)),
+    path('payments/registration/', include(registration_payment_patterns)),
+    path('providers/', include(provider_patterns)),
+    path('captain/', include(captain_patterns)),
+
     path('services/', provider_views.get_services, name='get-services'),
-    path('providers/by-area/', provider_views.get_services_and_providers, name='providers-by-area'),
     path("government-services/", views.government_service_api),
-    
-    # Provider Registration APIs
-    path('providers/profile', provider_views.create_or_update_provider_profile, name='create_or_update_provider_profile'),
-    path('providers/profile/me', provider_views.get_provider_profile, name='get_provider_profile'),
-    path('providers/profile/submit', provider_views.submit_provider_application, name='submit_provider_application'),
-    
-    # Provider Subscription & Payment
-    path('providers/subscription/create', provider_views.create_subscription_payment, name='create_subscription_payment'),
-    path('providers/subscription/checkout/<int:subscription_id>', provider_views.subscription_payment_checkout, name='subscription_payment_checkout'),
-    path('providers/subscription/callback', provider_views.subscription_payment_callback, name='subscription_payment_callback'),
-    path('providers/subscription/status/<int:subscription_id>', provider_views.check_subscription_status, name='check_subscription_status'),
-    path('providers/subscription/active', provider_views.get_active_subscription, name='get_active_subscription'),
 
     path('ai/guide/', views.get_ai_guide, name='ai-guide'),
+    path('ai/guide/stream/', views.stream_ai_guide, name='ai-guide-stream'),
     path('service-answer/', views.service_question_answer_api, name='service_question_answer'),
-
-    path('captain/pending-providers/', views.list_pending_providers, name='list-pending-providers'),
-    path('captain/verify-provider/', views.verify_provider_service, name='verify-provider-service'),
-]
\ No newline at end of file
+]
@@ -1,34 +1,66 @@
 from apis.provider_serializers import ServiceProviderDetailSerializer
-from providers.models import GovernmentService, ServiceProvider, ServiceQuestion, ServiceQuestionAnswer
+from apis.provider_views import (
+    CHECKOUT_MAX_REFRESHES,
+    ORDER_FAILED_MESSAGE,
+    checkout_refresh_attempt,
+    provider_detail_queryset,
+)
+from providers.models import GovernmentService, ServicePricing, ServiceProvider, ServiceQuestion, ServiceQuestionAnswer, ServiceType
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate, get_user_model
-from django.shortcuts import render, redirect
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
 from .serializers import (
     GovernmentServiceSerializer,
     ServiceQuestionSerializer,
     UserRegistrationSerializer, 
     UserLoginSerializer, 
     UserSerializer,
-    RegistrationPaymentSerializer
+    annotate_user_status,
+    user_to_dict
 )
 from accounts.models import CaptainProfile, RegistrationPayment
-import razorpay
-import hmac
-from .services.gemini_service import GeminiAIService
-import hashlib
+from .caching import (
+    AI_GUIDE_TIMEOUT,
+    PAYMENT_STATUS_TIMEOUT,
+    REFERENCE_DATA_TIMEOUT,
+    USER_PAYLOAD_TIMEOUT,
+    ai_guide_key,
+    cached_json_response,
+    invalidate_payment_status,
+    invalidate_user_payload,
+    payment_status_key,
+    reference_data_key,
+    render_message_page,
+    render_page,
+    user_payload_key,
+)
+from django.core.cache import cache
+from .services.razorpay_service import verify_payment_signature
+from .tasks import create_registration_order
+from .services.gemini_service import get_gemini_service
 from django.utils import timezone
+import json
+import logging
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.decorators import parser_classes
+from rest_framework.pagination import LimitOffsetPagination
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
-# Initialize Razorpay Client
-razorpay_client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+# Settings read on every payment request, bound once at import
+RAZORPAY_KEY_ID = settings.RAZORPAY_KEY_ID
+FRONTEND_URL = settings.FRONTEND_URL
+REGISTRATION_CHECKOUT_URL = f"{settings.BASE_URL}/api/payments/registration/checkout/{{}}"
+REGISTRATION_CALLBACK_URL = f"{settings.BASE_URL}/api/payments/registration/callback"
 
 def get_tokens_for_user(user):
     """Generate JWT tokens for user"""
@@ -72,8 +104,8 @@ def login(request):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    phone = serializer.validated_data.get('phone', '').strip() if serializer.validated_data.get('phone') else None
-    email = serializer.validated_data.get('email', '').strip() if serializer.validated_data.get('email') else None
+    phone = serializer.validated_data['phone']
+    email = serializer.validated_data['email']
     password = serializer.validated_data['password']
     
     # Authenticate user with phone or email
@@ -107,7 +139,14 @@ def login(request):
     
     # Generate tokens
     tokens = get_tokens_for_user(user)
-    user_data = UserSerializer(user).data
+    
+    # Same payload as /auth/me: reuse its cache entry, or build it from the user
+    # authenticate() already loaded (only the status flags need a query)
+    key = user_payload_key(user.pk)
+    user_data = cache.get(key)
+    if user_data is None:
+        user_data = user_to_dict(user)
+        cache.set(key, user_data, USER_PAYLOAD_TIMEOUT)
     
     return Response({
         'success': True,
@@ -120,12 +159,18 @@ def login(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def me(request):
-    user = request.user
-    serializer = UserSerializer(user)
+    # Called on every session bootstrap: serve the cached payload, building the
+    # UserSerializer output directly on a miss
+    key = user_payload_key(request.user.pk)
+    data = cache.get(key)
+    if data is None:
+        user = annotate_user_status(User.objects.filter(pk=request.user.pk)).get()
+        data = user_to_dict(user)
+        cache.set(key, data, USER_PAYLOAD_TIMEOUT)
     
     return Response({
         'success': True,
-        'user': serializer.data
+        'user': data
     }, status=status.HTTP_200_OK)
 
 
@@ -140,34 +185,42 @@ def create_payment_link(request):
             'message': 'user_id is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    try:
-        user = User.objects.get(id=user_id)
-    except User.DoesNotExist:
-        return Response({
-            'success': False,
-            'message': 'User not found'
-        }, status=status.HTTP_404_NOT_FOUND)
-    
     # if user.is_active:
     #     return Response({
     #         'success': False,
     #         'message': 'User account already activated'
     #     }, status=status.HTTP_400_BAD_REQUEST)
     
-    if RegistrationPayment.objects.filter(user=user, status='SUCCESS').exists():
+    # One pass over the user's payments (newest first, regpay_user_status_idx)
+    # answers both "already paid?" and "pending order to reuse?"
+    payments = list(
+        RegistrationPayment.objects.filter(
+            user_id=user_id,
+            status__in=['SUCCESS', 'PENDING']
+        ).only('id', 'status', 'gateway_ref')
+    )
+    
+    # A payment row implies the user exists (FK); only check when there is none
+    if not payments and not User.objects.filter(pk=user_id).exists():
+        return Response({
+            'success': False,
+            'message': 'User not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if any(p.status == 'SUCCESS' for p in payments):
         return Response({
         'success': False,
         'message': 'Registration already completed. You are already subscribed.'
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    existing_payment = RegistrationPayment.objects.filter(
-        user=user, 
-        status='PENDING'
-    ).first()
+    existing_payment = next((p for p in payments if p.status == 'PENDING'), None)
     
-    if existing_payment and existing_payment.gateway_ref:
-        # Return existing payment link
-        payment_url = f"{settings.BASE_URL}/api/payments/registration/checkout/{existing_payment.id}"
+    if existing_payment:
+        # Return existing payment link; re-enqueue the order if it never got one
+        # (the task skips payments that already have a gateway_ref)
+        if not existing_payment.gateway_ref:
+            create_registration_order.delay(existing_payment.id)
+        payment_url = REGISTRATION_CHECKOUT_URL.format(existing_payment.id)
         return Response({
             'success': True,
             'message': 'Payment link already exists',
@@ -175,33 +228,36 @@ def create_payment_link(request):
             'payment_id': existing_payment.id
         }, status=status.HTTP_200_OK)
     
+    # Create payment record; the Razorpay order is created in the background and
+    # the checkout page refreshes until gateway_ref is filled in.
+    # The one_pending_registration_payment_per_user constraint rejects a
+    # concurrent duplicate (double click) atomically; it gets the winner's link.
     try:
-        # Create Razorpay Order
-        razorpay_order = razorpay_client.order.create({
-            'amount': 10000,  # ₹100 in paise
-            'currency': 'INR',
-            'payment_capture': 1,
-            'notes': {
-                'user_id': str(user_id),
-                'payment_type': 'registration'
-            }
-        })
-        
-        # Create payment record
-        if existing_payment:
-            existing_payment.gateway_ref = razorpay_order['id']
-            existing_payment.save()
-            payment = existing_payment
-        else:
+        with transaction.atomic():
             payment = RegistrationPayment.objects.create(
-                user=user,
+                user_id=user_id,
                 amount=100.00,
-                status='PENDING',
-                gateway_ref=razorpay_order['id']
+                status='PENDING'
             )
+    except IntegrityError:
+        pending_id = RegistrationPayment.objects.filter(
+            user_id=user_id,
+            status='PENDING'
+        ).values_list('id', flat=True).first()
+        if pending_id is None:
+            raise
+        return Response({
+            'success': True,
+            'message': 'Payment link already exists',
+            'payment_url': REGISTRATION_CHECKOUT_URL.format(pending_id),
+            'payment_id': pending_id
+        }, status=status.HTTP_200_OK)
+    
+    try:
+        create_registration_order.delay(payment.id)
         
         # Return payment URL that frontend can open
-        payment_url = f"{settings.BASE_URL}/api/payments/registration/checkout/{payment.id}"
+        payment_url = REGISTRATION_CHECKOUT_URL.format(payment.id)
         
         return Response({
             'success': True,
@@ -211,6 +267,7 @@ def create_payment_link(request):
         }, status=status.HTTP_201_CREATED)
         
     except Exception as e:
+        payment.delete()
         return Response({
             'success': False,
             'message': f'Payment error: {str(e)}'
@@ -220,107 +277,101 @@ def create_payment_link(request):
 @csrf_exempt
 def payment_checkout(request, payment_id):
     try:
-        payment = RegistrationPayment.objects.get(id=payment_id, status='PENDING')
+        payment = RegistrationPayment.objects.get(id=payment_id, status__in=['PENDING', 'FAILED'])
+        order_pending = not payment.gateway_ref
+        attempt = checkout_refresh_attempt(request)
+        # FAILED: the order task gave up; a still-missing order after the retry
+        # window means it is not coming either
+        if payment.status == 'FAILED' or (order_pending and attempt >= CHECKOUT_MAX_REFRESHES):
+            return render_message_page('payment_error.html', ORDER_FAILED_MESSAGE)
+        
         user = payment.user
         
         # if user.is_active:
-        #     return render(request, 'payment_error.html', {
+        #     return render_page(request, 'payment_error.html', {
         #         'error_message': 'User account already activated',
         #         'frontend_url': settings.FRONTEND_URL
         #     })
         
         context = {
-            'razorpay_key': settings.RAZORPAY_KEY_ID,
+            'order_pending': order_pending,
+            'next_attempt': attempt + 1,
+            'razorpay_key': RAZORPAY_KEY_ID,
             'order_id': payment.gateway_ref,
-            'amount': int(payment.amount * 100),  # Convert to paise
+            'amount': payment.amount_paise,
             'currency': 'INR',
             'user_name': user.name,
             'user_email': user.email or '',
             'user_phone': user.phone,
-            'callback_url': f"{settings.BASE_URL}/api/payments/registration/callback",
+            'callback_url': REGISTRATION_CALLBACK_URL,
             'payment_id': payment.id
         }
         
-        return render(request, 'razorpay_checkout.html', context)
+        return render_page(request, 'razorpay_checkout.html', context)
         
     except RegistrationPayment.DoesNotExist:
-        return render(request, 'payment_error.html', {
-            'error_message': 'Payment not found or already processed',
-            'frontend_url': settings.FRONTEND_URL
-        })
+        return render_message_page('payment_error.html', 'Payment not found or already processed')
 
 
 @csrf_exempt
 def payment_callback(request):
     if request.method != 'POST':
-        return render(request, 'payment_error.html', {
-            'error_message': 'Invalid request method',
-            'frontend_url': settings.FRONTEND_URL
-        })
+        return render_message_page('payment_error.html', 'Invalid request method')
     
     razorpay_order_id = request.POST.get('razorpay_order_id')
     razorpay_payment_id = request.POST.get('razorpay_payment_id')
     razorpay_signature = request.POST.get('razorpay_signature')
     
     if not all([razorpay_order_id, razorpay_payment_id, razorpay_signature]):
-        return render(request, 'payment_error.html', {
-            'error_message': 'Missing payment details',
-            'frontend_url': settings.FRONTEND_URL
-        })
+        return render_message_page('payment_error.html', 'Missing payment details')
     
     try:
-        # Verify signature
-        generated_signature = hmac.new(
-            settings.RAZORPAY_KEY_SECRET.encode(),
-            f"{razorpay_order_id}|{razorpay_payment_id}".encode(),
-            hashlib.sha256
-        ).hexdigest()
-        
-        if generated_signature != razorpay_signature:
-            return render(request, 'payment_failure.html', {
-                'error_message': 'Payment verification failed',
-                'frontend_url': settings.FRONTEND_URL
-            })
-        
-        # Find payment record
-        payment = RegistrationPayment.objects.filter(
-            gateway_ref=razorpay_order_id,
-            status='PENDING'
-        ).first()
+        # Verify signature (constant-time compare against the pre-encoded secret)
+        if not verify_payment_signature(razorpay_order_id, razorpay_payment_id, razorpay_signature):
+            return render_message_page('payment_failure.html', 'Payment verification failed')
         
-        if not payment:
-            return render(request, 'payment_error.html', {
-                'error_message': 'Payment record not found',
-                'frontend_url': settings.FRONTEND_URL
-            })
-        
-        user = payment.user
-        
-        # Update payment status
-        payment.status = 'SUCCESS'
-        payment.gateway_order_id = razorpay_payment_id
-        payment.save()
-        
-        # Activate user account
-        if not user.is_active:
-            user.is_active = True
-            user.save()
+        # Lock the pending row so duplicate/retried callbacks are processed once;
+        # the payment and the account activation commit together
+        with transaction.atomic():
+            # The joined user feeds activation, tokens and the success page
+            # directly; its password hash is never read here
+            payment = RegistrationPayment.objects.select_for_update(
+                of=('self',)
+            ).select_related('user').defer('user__password').filter(
+                gateway_ref=razorpay_order_id,
+                status='PENDING'
+            ).first()
+            
+            if not payment:
+                return render_message_page('payment_error.html', 'Payment record not found')
+            
+            user = payment.user
+            
+            # Write only the changed columns
+            RegistrationPayment.objects.filter(pk=payment.pk).update(
+                status='SUCCESS',
+                gateway_order_id=razorpay_payment_id,
+                updated_at=timezone.now()
+            )
+            if not user.is_active:
+                User.objects.filter(pk=payment.user_id, is_active=False).update(is_active=True)
+                user.is_active = True
+            # .update() skips post_save, so clear the cached payloads here
+            transaction.on_commit(lambda: invalidate_user_payload(user.pk))
+            transaction.on_commit(lambda: invalidate_payment_status(payment.pk))
         
         # Generate tokens
         tokens = get_tokens_for_user(user)
         
-        return render(request, 'payment_success.html', {
+        return render_page(request, 'payment_success.html', {
             'user': user,
             'access_token': tokens['access'],
             'refresh_token': tokens['refresh'],
-            'frontend_url': settings.FRONTEND_URL
+            'frontend_url': FRONTEND_URL
         })
         
     except Exception as e:
-        return render(request, 'payment_error.html', {
-            'error_message': f'Error: {str(e)}',
-            'frontend_url': settings.FRONTEND_URL
-        })
+        return render_message_page('payment_error.html', f'Error: {str(e)}')
 
 
 @api_view(['GET'])
@@ -331,17 +382,25 @@ def check_payment_status(request, payment_id):
     GET /api/payments/registration/status/<payment_id>
     """
     try:
-        payment = RegistrationPayment.objects.get(id=payment_id)
+        # One joined row, no model instances (this endpoint is polled, so the
+        # row is cached briefly and cleared when the payment changes)
+        key = payment_status_key(payment_id)
+        payment = cache.get(key)
+        if payment is None:
+            payment = RegistrationPayment.objects.values(
+                'id', 'status', 'user_id', 'user__is_active', 'amount', 'created_at', 'updated_at'
+            ).get(id=payment_id)
+            cache.set(key, payment, PAYMENT_STATUS_TIMEOUT)
         
         return Response({
             'success': True,
-            'payment_id': payment.id,
-            'status': payment.status,
-            'user_id': payment.user.id,
-            'user_active': payment.user.is_active,
-            'amount': float(payment.amount),
-            'created_at': payment.created_at,
-            'updated_at': payment.updated_at
+            'payment_id': payment['id'],
+            'status': payment['status'],
+            'user_id': payment['user_id'],
+            'user_active': payment['user__is_active'],
+            'amount': float(payment['amount']),
+            'created_at': payment['created_at'],
+            'updated_at': payment['updated_at']
         }, status=status.HTTP_200_OK)
         
     except RegistrationPayment.DoesNotExist:
@@ -351,6 +410,30 @@ def check_payment_status(request, payment_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+def parse_ai_guide_request(request):
+    """Return (question, language, error_response) from an AI guide JSON body"""
+    try:
+        payload = json.loads(request.body or b'{}')
+        if not isinstance(payload, dict):
+            raise ValueError
+    except ValueError:
+        return None, None, JsonResponse({
+            'success': False,
+            'message': 'Invalid JSON body'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    question = (payload.get('question') or '').strip()
+    language = (payload.get('language') or 'english').strip().lower()
+    
+    if not question:
+        return None, None, JsonResponse({
+            'success': False,
+            'message': 'Question is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return question, language, None
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def get_ai_guide(request):
@@ -363,8 +446,17 @@ def get_ai_guide(request):
             'message': 'Question is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    # Repeat questions (same scheme, same language) are answered from the cache
+    cache_key = ai_guide_key(question, language)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return Response({
+            'success': True,
+            'data': cached
+        })
+    
     try:
-        ai_service = GeminiAIService()
+        ai_service = get_gemini_service()
         result = ai_service.get_ai_guide(question, language)
         
         if not result['success']:
@@ -374,6 +466,8 @@ def get_ai_guide(request):
                 'error': result.get('error')
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
+        cache.set(cache_key, result, AI_GUIDE_TIMEOUT)
+        
         return Response({
             'success': True,
             'data': result
@@ -385,14 +479,84 @@ def get_ai_guide(request):
             'message': 'Server error',
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@csrf_exempt
+@require_POST
+def stream_ai_guide(request):
+    """Stream the AI guide as HTML while Gemini generates it (same input as get_ai_guide)"""
+    question, language, error_response = parse_ai_guide_request(request)
+    if error_response:
+        return error_response
+    
+    cache_key = ai_guide_key(question, language)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return HttpResponse(cached['response'], content_type='text/html; charset=utf-8')
+    
+    # Wait for the first piece so model failures still get a JSON error response
+    service = get_gemini_service()
+    raw_parts = []
+    try:
+        pieces = service.stream_ai_guide(question, language, raw_parts)
+        first = next(pieces, None)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'message': 'AI Service Unavailable',
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    if first is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'Empty response from AI'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    # A sync generator, so WSGI sends each piece as it is produced (Django would
+    # buffer an async iterator completely under WSGI)
+    def body():
+        yield first
+        try:
+            yield from pieces
+        except Exception as e:
+            # Headers are already sent; close the wrapper and stop
+            logger.warning(f"AI guide stream interrupted: {e}")
+            yield '</div>'
+            return
+        
+        # Cache the same fully cleaned result get_ai_guide would store, not the
+        # per-piece cleaned stream
+        result = service.build_result_from_text(''.join(raw_parts), language)
+        if result['success']:
+            cache.set(cache_key, result, AI_GUIDE_TIMEOUT)
+    
+    response = StreamingHttpResponse(body(), content_type='text/html; charset=utf-8')
+    # Ask nginx-style proxies not to buffer the stream either
+    response['X-Accel-Buffering'] = 'no'
+    return response
     
 @api_view(["GET", "POST"])
 @permission_classes([AllowAny])
 def government_service_api(request):
     if request.method == "GET":
-        services = GovernmentService.objects.all()
-        serializer = GovernmentServiceSerializer(services, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Opt-in paging (?limit=&offset=) for clients that don't want the whole list;
+        # the default unpaged response is unchanged and served from the cache
+        if "limit" in request.query_params:
+            paginator = LimitOffsetPagination()
+            services = GovernmentService.objects.only("id", "name", "description").order_by("id")
+            page = paginator.paginate_queryset(services, request)
+            if page is not None:
+                return paginator.get_paginated_response(
+                    GovernmentServiceSerializer(page, many=True).data
+                )
+            # ?limit=abc, ?limit=0 and ?limit= give no page; serve the full list as before
+
+        def build_payload():
+            services = GovernmentService.objects.only("id", "name", "description")
+            return GovernmentServiceSerializer(services, many=True).data
+
+        return cached_json_response(reference_data_key('gov_services'), build_payload)
 
     if request.method == "POST":
         service_id = request.data.get("service_id")
@@ -403,13 +567,18 @@ def government_service_api(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if not GovernmentService.objects.filter(id=service_id).exists():
+        questions = list(
+            ServiceQuestion.objects.filter(service_id=service_id).only('id', 'question')
+        )
+
+        # Only an empty result needs the second query to tell "no questions yet"
+        # apart from an unknown service
+        if not questions and not GovernmentService.objects.filter(id=service_id).exists():
             return Response(
                 {"error": "Invalid service_id"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        questions = ServiceQuestion.objects.filter(service_id=service_id)
         serializer = ServiceQuestionSerializer(questions, many=True)
 
         return Response(
@@ -432,11 +601,26 @@ def service_question_answer_api(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    try:
-        answer = ServiceQuestionAnswer.objects.select_related(
-            'question', 'question__service'
-        ).get(question_id=question_id)
-    except ServiceQuestionAnswer.DoesNotExist:
+    if not question_id.isdigit():
+        return Response(
+            {"error": "question_id must be an integer"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # Only the columns in the response, and only the requested language's answer.
+    # Answers are reference data: cached under the versioned key, which
+    # apis.signals bumps when a service, question or answer changes.
+    answer_field = "answer_hindi" if language.lower() == "hindi" else "answer_english"
+    key = reference_data_key(f"service_answer:{question_id}:{answer_field}")
+    answer = cache.get(key)
+    if answer is None:
+        answer = ServiceQuestionAnswer.objects.filter(question_id=question_id).values(
+            "question__question", "question__service__name", answer_field
+        ).first()
+        if answer is not None:
+            cache.set(key, answer, REFERENCE_DATA_TIMEOUT)
+
+    if answer is None:
         return Response(
             {"error": "Answer not found for this question"},
             status=status.HTTP_404_NOT_FOUND
@@ -445,9 +629,9 @@ def service_question_answer_api(request):
     # Return answer based on language preference
     response_data = {
         "question_id": question_id,
-        "question": answer.question.question,
-        "service_name": answer.question.service.name,
-        "answer": answer.answer_hindi if language.lower() == "hindi" else answer.answer_english,
+        "question": answer["question__question"],
+        "service_name": answer["question__service__name"],
+        "answer": answer[answer_field],
         # "answer_english": answer.answer_english,
         # "answer_hindi": answer.answer_hindi
     }
@@ -468,10 +652,17 @@ def list_pending_providers(request):
             'message': 'Only captains can access this resource'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    # Get all providers with PENDING_VERIFICATION status
-    providers = ServiceProvider.objects.filter(
-        verification_status='PENDING_VERIFICATION'
-    ).order_by('-submitted_at')
+    # Get all providers with PENDING_VERIFICATION status, with every relation the
+    # detail serializer reads loaded up front (fixed query count, not per row)
+    providers = list(
+        provider_detail_queryset().filter(
+            verification_status='PENDING_VERIFICATION'
+        ).prefetch_related(
+            'service_categories',
+            Prefetch('service_types', queryset=ServiceType.objects.select_related('category')),
+            Prefetch('service_pricings', queryset=ServicePricing.objects.select_related('service_type')),
+        ).order_by('-submitted_at')
+    )
     
     serializer = ServiceProviderDetailSerializer(
         providers,
@@ -481,7 +672,7 @@ def list_pending_providers(request):
     
     return Response({
         'success': True,
-        'count': providers.count(),
+        'count': len(providers),
         'data': serializer.data
     }, status=status.HTTP_200_OK)
 
@@ -532,9 +723,9 @@ def verify_provider_service(request):
             'message': 'Invalid captain code'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get the provider service
+    # Get the provider service, with the relations the response serializer reads
     try:
-        provider = ServiceProvider.objects.get(id=profile_id)
+        provider = provider_detail_queryset().get(id=profile_id)
     except ServiceProvider.DoesNotExist:
         return Response({
             'success': False,
@@ -560,7 +751,10 @@ def verify_provider_service(request):
     provider.verified_by = user
     provider.verification_date = timezone.now()
     provider.verification_image = verification_image
-    provider.save()
+    provider.save(update_fields=[
+        'verification_status', 'verified_by', 'verification_date',
+        'verification_image', 'updated_at'
+    ])
     
     # Return updated provider details
     serializer = ServiceProviderDetailSerializer(
@@ -605,12 +799,13 @@ def submit_captain_verification(request):
             'message': 'aadhaar_back is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Find user by phone or captain_code
+    # Find user by phone or captain_code, joining the captain profile in the same query
+    users = User.objects.select_related('captain_profile')
     try:
         if captain_code:
-            user = User.objects.get(captain_code=captain_code.strip())
+            user = users.get(captain_code=captain_code.strip())
         else:
-            user = User.objects.get(phone=phone.strip())
+            user = users.get(phone=phone.strip())
     except User.DoesNotExist:
         return Response({
             'success': False,
@@ -634,16 +829,20 @@ def submit_captain_verification(request):
     # Use provided phone or user's registered phone
     verification_phone = phone.strip() if phone else user.phone
     
-    # Check if captain profile already exists
-    if hasattr(user, 'captain_profile'):
-        # Update existing profile
-        captain_profile = user.captain_profile
+    # Check if captain profile already exists (already loaded by select_related)
+    captain_profile = getattr(user, 'captain_profile', None)
+    if captain_profile is not None:
+        # Update existing profile; save() rather than .update() so the new
+        # images go through the storage backend
         captain_profile.phone = verification_phone
         captain_profile.aadhaar_front = aadhaar_front
         captain_profile.aadhaar_back = aadhaar_back
         captain_profile.verification_status = 'PENDING'
         captain_profile.rejection_reason = ''
-        captain_profile.save()
+        captain_profile.save(update_fields=[
+            'phone', 'aadhaar_front', 'aadhaar_back',
+            'verification_status', 'rejection_reason', 'updated_at'
+        ])
         message = 'Captain verification documents updated successfully. Please wait for admin verification.'
     else:
         # Create new profile
@@ -121,6 +121,25 @@ DATABASES = {
     }
 }
 
+# Cache
+# Uses Redis when REDIS_URL is set. Without it caching is disabled: signal-based
+# invalidation only reaches the current process, so a per-process cache would
+# serve stale data from the other workers.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -139,6 +158,18 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Argon2 (argon2-cffi, native code) is used for new hashes. Existing PBKDF2 hashes
+# still verify and are re-hashed with Argon2 on the user's next successful login.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# manage.py test swaps in a cheap hasher (see test_runner.py); runtime settings never do
+TEST_RUNNER = 'bharatabhiyan.test_runner.FastPasswordHashingRunner'
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
@@ -160,7 +191,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'apis.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -171,8 +202,15 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
+    # Only takes effect with rest_framework_simplejwt.token_blacklist installed. It is
+    # left out on purpose, so issuing tokens never writes OutstandingToken rows;
+    # any revocation list should live in the cache rather than the database.
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # HMAC signing with the key pinned here; simplejwt builds its TokenBackend
+    # once per process, so login pays only the two token signatures
+    'ALGORITHM': 'HS256',
+    'SIGNING_KEY': SECRET_KEY,
 }
 
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
@@ -187,4 +225,18 @@ FRONTEND_URL = 'https://bharatabhiyan-frontend.vercel.app'
 BASE_URL = 'https://bharatabhiyan.onrender.com'
 
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
+
+# Celery Configuration
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')
+# Without a broker there is no worker consuming the payments queue, so tasks run
+# inline in the web process (Razorpay orders are created during the request, as before)
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'False') == 'True' or not CELERY_BROKER_URL
+CELERY_TASK_IGNORE_RESULT = True
+# Blocking payment-gateway calls get their own queue so a small, high-concurrency
+# worker pool can serve them: celery -A bharatabhiyan worker -Q payments -P threads
+CELERY_TASK_ROUTES = {
+    'apis.tasks.create_subscription_order': {'queue': 'payments'},
+    'apis.tasks.create_registration_order': {'queue': 'payments'},
+}
+
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
\ No newline at end of file
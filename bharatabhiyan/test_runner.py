@@ -0,0 +1,20 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class FastPasswordHashingRunner(DiscoverRunner):
+    """
+    DiscoverRunner that hashes test users' passwords with MD5 so register/login
+    tests stay fast. Only used by manage.py test; Argon2 stays the runtime default.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._fast_hashers = override_settings(
+            PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+        )
+        self._fast_hashers.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._fast_hashers.disable()
+        super().teardown_test_environment(**kwargs)
@@ -201,6 +201,7 @@ class ProviderSubscriptionAdmin(admin.ModelAdmin):
             'ACTIVE': 'green',
             'EXPIRED': 'gray',
             'CANCELLED': 'red',
+            'FAILED': 'red',
         }
         color = colors.get(obj.status, 'gray')
         return format_html(
@@ -361,16 +362,19 @@ class CaptainProfileAdmin(admin.ModelAdmin):
     def verify_captains(self, request, queryset):
         """Verify selected captains"""
         updated = 0
-        for captain_profile in queryset.filter(verification_status='PENDING'):
+        for captain_profile in queryset.filter(verification_status='PENDING').select_related('user'):
             captain_profile.verification_status = 'VERIFIED'
             captain_profile.verified_by = request.user
             captain_profile.verification_date = timezone.now()
             captain_profile.rejection_reason = ''
-            captain_profile.save()
+            captain_profile.save(update_fields=[
+                'verification_status', 'verified_by', 'verification_date',
+                'rejection_reason', 'updated_at'
+            ])
             
             # Update user's admin_verified flag
             captain_profile.user.admin_verified = True
-            captain_profile.user.save()
+            captain_profile.user.save(update_fields=['admin_verified'])
             
             updated += 1
         
@@ -380,15 +384,17 @@ class CaptainProfileAdmin(admin.ModelAdmin):
     def reject_captains(self, request, queryset):
         """Reject selected captains"""
         updated = 0
-        for captain_profile in queryset.filter(verification_status='PENDING'):
+        for captain_profile in queryset.filter(verification_status='PENDING').select_related('user'):
             captain_profile.verification_status = 'REJECTED'
             captain_profile.verified_by = request.user
             captain_profile.verification_date = timezone.now()
-            captain_profile.save()
+            captain_profile.save(update_fields=[
+                'verification_status', 'verified_by', 'verification_date', 'updated_at'
+            ])
             
             # Update user's admin_verified flag
             captain_profile.user.admin_verified = False
-            captain_profile.user.save()
+            captain_profile.user.save(update_fields=['admin_verified'])
             
             updated += 1
         
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-16 10:30
+
+from django.db import migrations, models
+
+
+def cancel_duplicate_open_subscriptions(apps, schema_editor):
+    ProviderSubscription = apps.get_model('providers', 'ProviderSubscription')
+    seen = set()
+    duplicates = []
+    for sub in ProviderSubscription.objects.filter(
+        status__in=['PENDING_ORDER', 'PENDING']
+    ).order_by('provider_id', '-created_at').only('id', 'provider_id'):
+        if sub.provider_id in seen:
+            duplicates.append(sub.id)
+        else:
+            seen.add(sub.provider_id)
+    ProviderSubscription.objects.filter(id__in=duplicates).update(status='CANCELLED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0008_alter_providersubscription_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_open_subscriptions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='providersubscription',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING_ORDER', 'PENDING'])), fields=('provider',), name='one_open_subscription_per_provider'),
+        ),
+    ]
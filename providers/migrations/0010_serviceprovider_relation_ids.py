@@ -0,0 +1,56 @@
+# Generated by Django 5.1.3 on 2026-10-16 11:00
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def backfill_relation_ids(apps, schema_editor):
+    ServiceProvider = apps.get_model('providers', 'ServiceProvider')
+    providers = ServiceProvider.objects.prefetch_related(
+        'service_categories', 'service_types', 'service_areas'
+    )
+    for provider in providers:
+        ServiceProvider.objects.filter(pk=provider.pk).update(
+            category_ids=[c.id for c in provider.service_categories.all()],
+            type_ids=[t.id for t in provider.service_types.all()],
+            area_ids=[a.id for a in provider.service_areas.all()],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0009_providersubscription_one_open_subscription_per_provider'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='category_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='type_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddField(
+            model_name='serviceprovider',
+            name='area_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['category_ids'], name='sp_category_ids_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['type_ids'], name='sp_type_ids_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['area_ids'], name='sp_area_ids_gin'),
+        ),
+        migrations.RunPython(backfill_relation_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.3 on 2026-10-16 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0010_serviceprovider_relation_ids'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='providersubscription',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['gateway_order_id'], name='psub_pending_gwid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='providersubscription',
+            index=models.Index(fields=['provider', 'status', 'end_date'], name='psub_provider_status_end_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-16 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0011_providersubscription_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='serviceprovider',
+            index=models.Index(condition=models.Q(('verification_status', 'PENDING_VERIFICATION')), fields=['-submitted_at'], name='sp_pending_submitted_idx'),
+        ),
+    ]
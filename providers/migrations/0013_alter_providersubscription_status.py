@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-16 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0012_serviceprovider_pending_submitted_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='providersubscription',
+            name='status',
+            field=models.CharField(choices=[('PENDING_ORDER', 'Awaiting Payment Order'), ('PENDING', 'Pending'), ('ACTIVE', 'Active'), ('EXPIRED', 'Expired'), ('CANCELLED', 'Cancelled'), ('FAILED', 'Failed')], default='PENDING', max_length=20),
+        ),
+    ]
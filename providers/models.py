@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from locations.models import Location
 
 
@@ -89,6 +91,11 @@ class ServiceProvider(models.Model):
     service_description = models.TextField()
     service_areas = models.ManyToManyField(ServiceArea, related_name='providers')
     
+    # Denormalized M2M ids (kept in sync by providers.signals) for join-free filtering
+    category_ids = ArrayField(models.IntegerField(), default=list, blank=True, editable=False)
+    type_ids = ArrayField(models.IntegerField(), default=list, blank=True, editable=False)
+    area_ids = ArrayField(models.IntegerField(), default=list, blank=True, editable=False)
+    
     # Documents
     aadhaar_front = models.FileField(upload_to='provider_docs/aadhaar/', null=True, blank=True)
     aadhaar_back = models.FileField(upload_to='provider_docs/aadhaar/', null=True, blank=True)
@@ -121,10 +128,36 @@ class ServiceProvider(models.Model):
     class Meta:
         db_table = 'service_providers'
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['category_ids'], name='sp_category_ids_gin'),
+            GinIndex(fields=['type_ids'], name='sp_type_ids_gin'),
+            GinIndex(fields=['area_ids'], name='sp_area_ids_gin'),
+            # Captain review queue: list_pending_providers, newest submission first
+            models.Index(
+                fields=['-submitted_at'],
+                condition=models.Q(verification_status='PENDING_VERIFICATION'),
+                name='sp_pending_submitted_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.business_name} - {self.user.name}"
     
+    def sync_relation_ids(self, *fields):
+        """Copy the current M2M ids into the denormalized array columns"""
+        relation_map = {
+            'category_ids': self.service_categories,
+            'type_ids': self.service_types,
+            'area_ids': self.service_areas,
+        }
+        values = {
+            field: list(relation_map[field].values_list('id', flat=True))
+            for field in (fields or relation_map)
+        }
+        ServiceProvider.objects.filter(pk=self.pk).update(**values)
+        for field, ids in values.items():
+            setattr(self, field, ids)
+    
     def save(self, *args, **kwargs):
         if not self.application_id:
             # Generate application ID: BA-PRV-YYYY-XXXXX
@@ -175,10 +208,12 @@ class ProviderSubscription(models.Model):
     ]
     
     STATUS_CHOICES = [
+        ('PENDING_ORDER', 'Awaiting Payment Order'),
         ('PENDING', 'Pending'),
         ('ACTIVE', 'Active'),
         ('EXPIRED', 'Expired'),
         ('CANCELLED', 'Cancelled'),
+        ('FAILED', 'Failed'),
     ]
     
     provider = models.ForeignKey(ServiceProvider, on_delete=models.CASCADE, related_name='subscriptions')
@@ -201,6 +236,22 @@ class ProviderSubscription(models.Model):
     class Meta:
         db_table = 'provider_subscriptions'
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['provider'],
+                condition=models.Q(status__in=['PENDING_ORDER', 'PENDING']),
+                name='one_open_subscription_per_provider'
+            ),
+        ]
+        indexes = [
+            # Payment callback looks up the pending row by gateway order id
+            models.Index(
+                fields=['gateway_order_id'],
+                condition=models.Q(status='PENDING'),
+                name='psub_pending_gwid_idx'
+            ),
+            models.Index(fields=['provider', 'status', 'end_date'], name='psub_provider_status_end_idx'),
+        ]
     
     def __str__(self):
         return f"{self.provider.business_name} - {self.plan_type} - {self.status}"
@@ -0,0 +1,49 @@
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+from .models import ServiceArea, ServiceCategory, ServiceProvider, ServiceType
+
+# M2M through model -> denormalized array column on ServiceProvider
+RELATION_ID_FIELDS = {
+    ServiceProvider.service_categories.through: 'category_ids',
+    ServiceProvider.service_types.through: 'type_ids',
+    ServiceProvider.service_areas.through: 'area_ids',
+}
+
+# Related model -> the array column holding its ids
+RELATED_MODEL_FIELDS = {
+    ServiceCategory: 'category_ids',
+    ServiceType: 'type_ids',
+    ServiceArea: 'area_ids',
+}
+
+
+def resync_providers_containing(field, pk):
+    """Re-sync providers whose array column still lists pk (GIN-indexed lookup)"""
+    for provider in ServiceProvider.objects.filter(**{f'{field}__contains': [pk]}):
+        provider.sync_relation_ids(field)
+
+
+@receiver(m2m_changed)
+def sync_provider_relation_ids(sender, instance, action, reverse, pk_set, **kwargs):
+    field = RELATION_ID_FIELDS.get(sender)
+    if field is None or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        instance.sync_relation_ids(field)
+    elif action == 'post_clear':
+        # category.providers.clear() sends no pk_set; the array columns still
+        # hold the cleared id until they are re-synced
+        resync_providers_containing(field, instance.pk)
+    elif pk_set:
+        # Changed from the category/type/area side: pk_set holds provider ids
+        for provider in ServiceProvider.objects.filter(pk__in=pk_set):
+            provider.sync_relation_ids(field)
+
+
+@receiver(post_delete, sender=ServiceCategory)
+@receiver(post_delete, sender=ServiceType)
+@receiver(post_delete, sender=ServiceArea)
+def sync_provider_relation_ids_on_delete(sender, instance, **kwargs):
+    # Deleting a category/type/area removes its through rows without m2m_changed
+    resync_providers_containing(RELATED_MODEL_FIELDS[sender], instance.pk)